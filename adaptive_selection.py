@@ -0,0 +1,239 @@
+"""
+Adaptive question selection for Learning Buddy System
+Learner ability and item difficulty/discrimination follow a 1PL/2PL item
+response model; each next question is the one with maximum Fisher information
+at the learner's current ability, scored with NumPy over the whole bank
+"""
+
+import json
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from config_loader import get_setting
+from question_bank import QuestionBank, get_question_bank, normalize_topic
+
+ITEM_PARAMETERS_FILE = os.path.join("data", "item_parameters.json")
+ABILITY_DIR = "learning_data"
+THETA_LIMIT = 4.0
+PRIOR_INFORMATION = 1.0  # information a quiz starts from: the stored theta with unit variance
+DISCRIMINATION_RANGE = (0.25, 3.0)
+
+def level_difficulty(level: str) -> float:
+    """Prior difficulty of a level on the logit scale, from difficulty_levels.quiz_difficulty"""
+    p = get_setting("difficulty_levels", level, {}).get("quiz_difficulty", 0.5)
+    return math.log(p / (1 - p))
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class ItemParameters:
+    """Discrimination `a` and difficulty `b` for every bank question, aligned with bank.questions"""
+
+    def __init__(self, bank: QuestionBank, model: str = None, path: str = ITEM_PARAMETERS_FILE):
+        self.bank = bank
+        self.model = model or get_setting("adaptive_quiz", "irt_model", "2pl")
+        self.learning_rate = get_setting("adaptive_quiz", "learning_rate", 0.05)
+        self.path = path
+        self.a = np.ones(0)
+        self.b = np.zeros(0)
+        self.responses = np.zeros(0, dtype=np.int64)
+        self.positions = {}       # question id -> row
+        self.topic_rows = {}      # normalized topic -> np.ndarray of rows
+        self.dirty = False
+        # Shared by every user's quiz: updates, syncs and save snapshots take the lock
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.sync()
+
+    def sync(self):
+        """Add rows for questions added to the bank since the last sync"""
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        start = len(self.positions)
+        new = self.bank.questions[start:]
+        if not new:
+            return
+        stored = {}
+        if start == 0 and os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+
+        a, b, responses = [], [], []
+        for row, question in enumerate(new, start):
+            self.positions[question["id"]] = row
+            params = stored.get(question["id"])
+            if params:
+                a.append(params[0])
+                b.append(params[1])
+                responses.append(params[2])
+            else:
+                a.append(1.0)
+                b.append(level_difficulty(question["level"]))
+                responses.append(0)
+        self.a = np.concatenate([self.a, a])
+        self.b = np.concatenate([self.b, b])
+        self.responses = np.concatenate([self.responses, np.array(responses, dtype=np.int64)])
+
+        rows = {}
+        for row, question in enumerate(self.bank.questions):
+            rows.setdefault(normalize_topic(question["topic"]), []).append(row)
+        self.topic_rows = {topic: np.array(topic_rows) for topic, topic_rows in rows.items()}
+
+    def update(self, question_id: str, theta: float, correct: bool):
+        """One stochastic gradient step on the item's log-likelihood"""
+        with self.lock:
+            self._update(self.positions[question_id], theta, correct)
+
+    def _update(self, row: int, theta: float, correct: bool):
+        a, b = self.a[row], self.b[row]
+        residual = float(correct) - 1.0 / (1.0 + math.exp(-a * (theta - b)))
+        # Anchor items to their level prior while they have few responses
+        rate = self.learning_rate / math.sqrt(1 + self.responses[row])
+        self.b[row] = b - rate * a * residual
+        if self.model == "2pl":
+            self.a[row] = min(max(a + rate * (theta - b) * residual, DISCRIMINATION_RANGE[0]),
+                              DISCRIMINATION_RANGE[1])
+        self.responses[row] += 1
+        self.dirty = True
+
+    def save(self):
+        # Snapshots are written in the order they are taken; updates only wait for the snapshot
+        with self.save_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                # Rows stop at the last sync(); questions added to the bank since have no responses yet
+                questions = self.bank.questions
+                data = {questions[row]["id"]: [round(float(self.a[row]), 4), round(float(self.b[row]), 4),
+                                               int(self.responses[row])]
+                        for row in np.flatnonzero(self.responses)}
+                self.dirty = False
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+
+
+class AbilityEstimate:
+    """Per-topic learner ability (theta) with its accumulated Fisher information"""
+
+    def __init__(self, user_id: str, ability_dir: str = ABILITY_DIR):
+        self.path = os.path.join(ability_dir, f"{user_id}_ability.json")
+        self.topics: Dict[str, List[float]] = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                self.topics = json.load(f)
+
+    def get(self, topic: str, mastery_level: str) -> List[float]:
+        """[theta, information] for a topic; new topics start at the mastery level's difficulty"""
+        key = normalize_topic(topic)
+        if key not in self.topics:
+            # Unit-variance normal prior around the level
+            self.topics[key] = [level_difficulty(mastery_level), 1.0]
+        return self.topics[key]
+
+    def update(self, topic: str, mastery_level: str, a: float, b: float, correct: bool) -> float:
+        """One Newton step on the posterior after a response; returns the new theta"""
+        estimate = self.get(topic, mastery_level)
+        theta, information = estimate
+        p = 1.0 / (1.0 + math.exp(-a * (theta - b)))
+        information += a * a * p * (1 - p)
+        theta += a * (float(correct) - p) / information
+        estimate[0] = min(max(theta, -THETA_LIMIT), THETA_LIMIT)
+        estimate[1] = information
+        return estimate[0]
+
+    def start_quiz(self, topic: str, mastery_level: str, prior_information: float = PRIOR_INFORMATION):
+        """Keep the stored theta as the prior for a new quiz, capping its information
+
+        Information accumulated over earlier quizzes would otherwise make every later
+        quiz confident from the start and shrink each theta step towards nothing.
+        """
+        estimate = self.get(topic, mastery_level)
+        estimate[1] = min(estimate[1], prior_information)
+
+    def standard_error(self, topic: str, mastery_level: str) -> float:
+        return 1.0 / math.sqrt(self.get(topic, mastery_level)[1])
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump({topic: [round(theta, 4), round(info, 4)] for topic, (theta, info) in self.topics.items()}, f)
+
+
+_item_parameters = None
+
+def get_item_parameters() -> ItemParameters:
+    """Item parameters for the shared question bank, loaded once per process"""
+    global _item_parameters
+    if _item_parameters is None:
+        _item_parameters = ItemParameters(get_question_bank())
+    else:
+        _item_parameters.sync()
+    return _item_parameters
+
+
+class AdaptiveSelector:
+    """Maximum-information question selection for one user's quiz on one topic"""
+
+    def __init__(self, user_profile, topic: str):
+        self.user_profile = user_profile
+        self.topic = topic
+        self.mastery_level = user_profile.get_mastery_level(topic)
+        self.items = get_item_parameters()
+        self.ability = AbilityEstimate(user_profile.user_id)
+        self.target_standard_error = get_setting("adaptive_quiz", "target_standard_error", 0.6)
+        # The stopping rule only counts information gathered in this quiz
+        self.ability.start_quiz(topic, self.mastery_level,
+                                get_setting("adaptive_quiz", "prior_information", PRIOR_INFORMATION))
+
+    @property
+    def theta(self) -> float:
+        return self.ability.get(self.topic, self.mastery_level)[0]
+
+    def available(self) -> int:
+        rows = self.items.topic_rows.get(normalize_topic(self.topic))
+        return 0 if rows is None else len(rows)
+
+    def next_question(self, asked: Set[str]) -> Optional[Dict]:
+        """Unasked topic question with the highest information at the current theta"""
+        rows = self.items.topic_rows.get(normalize_topic(self.topic))
+        if rows is None:
+            return None
+        a = self.items.a[rows]
+        p = _sigmoid(a * (self.theta - self.items.b[rows]))
+        information = a * a * p * (1 - p)
+        if asked:
+            asked_rows = [self.items.positions[question_id] for question_id in asked
+                          if question_id in self.items.positions]
+            information[np.isin(rows, asked_rows)] = -1.0
+        best = int(np.argmax(information))
+        if information[best] < 0:
+            return None
+        return self.items.bank.questions[rows[best]]
+
+    def record(self, question: Dict, correct: bool):
+        """Update the item and the learner's ability after an answer"""
+        row = self.items.positions.get(question.get("id"))
+        if row is None:
+            return
+        theta = self.theta
+        a, b = float(self.items.a[row]), float(self.items.b[row])
+        self.items.update(question["id"], theta, correct)
+        self.ability.update(self.topic, self.mastery_level, a, b, correct)
+
+    def confident(self) -> bool:
+        """Whether the ability estimate is precise enough to stop asking"""
+        return self.ability.standard_error(self.topic, self.mastery_level) <= self.target_standard_error
+
+    def save(self):
+        self.items.save()
+        self.ability.save()
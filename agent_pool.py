@@ -0,0 +1,217 @@
+"""
+Agent pool for Learning Buddy System
+Agents and their crews are built on demand and shared by every user's
+LearningBuddySystem in the process: a call checks out an idle crew for its
+agent, swaps in its task text, runs it and hands the crew back for reuse
+"""
+
+import os
+import threading
+from typing import Dict, List
+from config_loader import get_setting
+
+# GROQ model used by every agent; crewai is only imported once an AI call needs it
+LLM_MODEL = "groq/llama3-8b-8192"
+LLM_TEMPERATURE = 0.3
+MAX_IDLE_PER_AGENT = 4  # idle crews kept per agent; more are built while calls overlap
+
+# The agents' prompts, keyed by agent name
+AGENT_SPECS = {
+    # 1. Learning Analyzer Agent
+    "learning_analyzer": {
+        "role": "Learning Progress Analyzer",
+        "goal": "Analyze user's learning progress, identify strengths, weaknesses, and patterns to optimize learning path",
+        "backstory": """You are an expert educational data analyst who specializes in understanding
+        individual learning patterns. You analyze quiz scores, study time, topic mastery levels,
+        and learning consistency to provide insights that help optimize the learning experience.
+        You identify which topics need more attention and which learning strategies work best for each user."""
+    },
+    # 2. Content Personalizer Agent
+    "content_personalizer": {
+        "role": "Content Personalization Specialist",
+        "goal": "Adapt learning content to match user's learning style, preferences, and current skill level",
+        "backstory": """You are a master educator who excels at personalizing content delivery.
+        You understand different learning styles (visual, auditory, kinesthetic, reading/writing)
+        and can adapt explanations accordingly. You know when to use simple explanations, detailed
+        analysis, analogies, or real-world examples based on user preferences and comprehension levels."""
+    },
+    # 3. Quiz Generator Agent
+    "quiz_generator": {
+        "role": "Adaptive Quiz Creator",
+        "goal": "Generate personalized quizzes that adapt to user's knowledge level and learning progress",
+        "backstory": """You are an expert assessment designer who creates engaging and effective quizzes.
+        You understand how to craft questions at appropriate difficulty levels, provide meaningful
+        feedback, and design assessments that reinforce learning. You adapt question types and
+        complexity based on user performance and mastery levels."""
+    },
+    # 4. Learning Path Planner Agent
+    "learning_planner": {
+        "role": "Adaptive Learning Path Designer",
+        "goal": "Create and adjust weekly learning plans based on user goals, progress, and available time",
+        "backstory": """You are an educational strategist who designs optimal learning journeys.
+        You understand how to sequence topics, balance difficulty progression, and respect time
+        constraints. You create realistic, achievable learning plans that adapt based on user
+        progress and changing circumstances."""
+    },
+    # 5. Motivational Coach Agent
+    "motivational_coach": {
+        "role": "Learning Motivation Coach",
+        "goal": "Provide encouragement, track achievements, and maintain user engagement in learning",
+        "backstory": """You are an enthusiastic learning coach who excels at keeping learners motivated.
+        You celebrate achievements, provide constructive feedback for struggles, set realistic goals,
+        and help users build sustainable learning habits. You understand the psychology of learning
+        and know how to maintain long-term engagement."""
+    },
+    # 6. Study Technique Advisor Agent
+    "study_advisor": {
+        "role": "Study Technique Optimization Specialist",
+        "goal": "Recommend and optimize study techniques based on user performance and learning patterns",
+        "backstory": """You are a learning science expert who knows the most effective study techniques
+        for different types of content and learners. You understand spaced repetition, active recall,
+        elaborative interrogation, and other evidence-based learning strategies. You recommend the
+        best techniques for each user's situation and learning goals."""
+    }
+}
+
+_llm_ready = False
+_llm_lock = threading.Lock()
+
+def new_llm():
+    """A GROQ LLM for one crew; crewai and `.env` are loaded on the first AI call
+
+    crewai counts token usage per LLM instance for its whole life, so every
+    crew gets its own and the pool can attribute usage to single calls.
+    """
+    global _llm_ready
+    from crewai import LLM
+    stream = get_setting("llm_config", "stream", False)
+    with _llm_lock:
+        if not _llm_ready:
+            from dotenv import load_dotenv
+            from llm_metrics import install_stream_listener
+            load_dotenv()
+            if stream:
+                # Streamed chunks give the metrics their time to first token
+                install_stream_listener()
+            _llm_ready = True
+    return LLM(
+        model=LLM_MODEL,
+        temperature=LLM_TEMPERATURE,
+        api_key=os.getenv("GROQ_API_KEY"),
+        **({"stream": True} if stream else {})
+    )
+
+def usage_totals(output):
+    """Cumulative (prompt, completion) tokens reported by a crew's output, or None"""
+    usage = getattr(output, "token_usage", None)
+    if usage is None or not getattr(usage, "total_tokens", 0):
+        return None
+    return usage.prompt_tokens, usage.completion_tokens
+
+
+class AgentPool:
+    """Idle one-agent crews per agent name; each crew serves one call at a time"""
+
+    def __init__(self, max_idle: int = None):
+        self.max_idle = max_idle or get_setting("agent_pool", "max_idle_per_agent", MAX_IDLE_PER_AGENT)
+        self.idle: Dict[str, List] = {}    # agent name -> crews ready for reuse
+        self.usage_seen: Dict[int, tuple] = {}  # id(crew) -> token totals after its last call
+        self.built: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.reused = 0
+        self.in_use = 0
+
+    def _build(self, agent_name: str, description: str, expected_output: str):
+        from crewai import Agent, Crew, Task
+        agent = Agent(
+            **AGENT_SPECS[agent_name],
+            llm=new_llm(),
+            verbose=True,
+            allow_delegation=False
+        )
+        task = Task(description=description, agent=agent, expected_output=expected_output)
+        return Crew(agents=[agent], tasks=[task])
+
+    def acquire(self, agent_name: str, description: str, expected_output: str, verbose: bool = False):
+        """A crew for `agent_name` set up to run the given task; hand it back with release()"""
+        if agent_name not in AGENT_SPECS:
+            raise KeyError(f"Unknown agent: {agent_name}")
+        with self.lock:
+            idle = self.idle.get(agent_name)
+            crew = idle.pop() if idle else None
+            self.in_use += 1
+            if crew is not None:
+                self.reused += 1
+        if crew is None:
+            # Building happens outside the lock; concurrent calls each get their own crew
+            try:
+                crew = self._build(agent_name, description, expected_output)
+            except Exception:
+                with self.lock:
+                    self.in_use -= 1
+                raise
+            with self.lock:
+                self.built[agent_name] = self.built.get(agent_name, 0) + 1
+        else:
+            task = crew.tasks[0]
+            task.description = description
+            task.expected_output = expected_output
+        crew.verbose = verbose
+        return crew
+
+    def release(self, agent_name: str, crew, reusable: bool = True):
+        """Return a crew after its call; crews from failed calls are dropped"""
+        with self.lock:
+            self.in_use -= 1
+            idle = self.idle.setdefault(agent_name, [])
+            if reusable and len(idle) < self.max_idle:
+                idle.append(crew)
+            else:
+                self.usage_seen.pop(id(crew), None)
+
+    def kickoff(self, agent_name: str, description: str, expected_output: str, verbose: bool = False):
+        """Run one task on a pooled crew; returns the crew's output and the call's token usage
+
+        crewai reports usage as running totals for the crew's LLM, so the usage
+        of this call is the difference from the totals after the crew's last call
+        (None when crewai reports none).
+        """
+        crew = self.acquire(agent_name, description, expected_output, verbose)
+        try:
+            result = crew.kickoff()
+        except Exception:
+            self.release(agent_name, crew, reusable=False)
+            raise
+        totals = usage_totals(result)
+        usage = None
+        if totals is not None:
+            # The crew is checked out, so no other call can move its totals meanwhile
+            with self.lock:
+                before = self.usage_seen.get(id(crew), (0, 0))
+                self.usage_seen[id(crew)] = totals
+            if totals[0] < before[0] or totals[1] < before[1]:
+                before = (0, 0)  # counters were reset
+            usage = {"prompt_tokens": totals[0] - before[0], "completion_tokens": totals[1] - before[1]}
+        self.release(agent_name, crew)
+        return result, usage
+
+    def metrics(self) -> Dict:
+        with self.lock:
+            return {
+                "built": dict(self.built),
+                "reused": self.reused,
+                "in_use": self.in_use,
+                "idle": {name: len(crews) for name, crews in self.idle.items()}
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_agent_pool() -> AgentPool:
+    """Process-wide agent pool shared by every LearningBuddySystem"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = AgentPool()
+        return _pool
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Bulk import/export of Learning Buddy users as JSONL
+Streams one user per line (optionally gzip-compressed) so memory use does not
+grow with the number of users; imports are written in batches across processes
+"""
+
+import argparse
+import gzip
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List
+
+from profile_storage import create_storage
+from schema import Profile, Progress
+from score_series import compact_json_default
+from user_profile import UserProfile
+
+def open_jsonl(path: str, mode: str):
+    """Open a JSONL file for text I/O, gzip-compressed when it ends in .gz"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def iter_user_records(storage) -> Iterator[Dict]:
+    """Yield one {"user_id", "profile", "progress"} record per stored user"""
+    for user_id in storage.iter_user_ids():
+        user_profile = UserProfile(user_id, storage=storage)
+        yield {
+            "user_id": user_id,
+            "profile": user_profile.profile.encode(),
+            "progress": user_profile.progress.encode()
+        }
+
+def export_users(output_path: str, storage=None) -> int:
+    """Stream every stored user to a JSONL file"""
+    storage = storage or create_storage()
+    exported = 0
+    with open_jsonl(output_path, "w") as f:
+        for record in iter_user_records(storage):
+            f.write(json.dumps(record, separators=(',', ':'), default=compact_json_default) + "\n")
+            exported += 1
+    return exported
+
+def decode_user_record(line: str) -> Dict:
+    """Parse one exported line back into profile and progress"""
+    record = json.loads(line)
+    record["profile"] = Profile.decode(record["profile"], user_id=record["user_id"]).encode()
+    record["progress"] = Progress.decode(record["progress"]).encode()
+    return record
+
+# Storage opened once per import worker process
+_worker_storage = None
+
+def _init_import_worker(backend: str, location: str):
+    global _worker_storage
+    _worker_storage = create_storage(backend, location)
+
+def _import_batch(lines: List[str]) -> int:
+    _worker_storage.save_users([decode_user_record(line) for line in lines])
+    return len(lines)
+
+def iter_batches(path: str, batch_size: int) -> Iterator[List[str]]:
+    batch = []
+    with open_jsonl(path, "r") as f:
+        for line in f:
+            if line.strip():
+                batch.append(line)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def import_users(input_path: str, backend: str = None, location: str = None,
+                 batch_size: int = 500, workers: int = None) -> int:
+    """Write users from a JSONL file in batches, spread over worker processes"""
+    workers = workers or os.cpu_count() or 1
+    imported = 0
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_import_worker,
+                             initargs=(backend, location)) as executor:
+        in_flight = set()
+        for batch in iter_batches(input_path, batch_size):
+            # Bound the batches held in memory
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                imported += sum(future.result() for future in done)
+            in_flight.add(executor.submit(_import_batch, batch))
+        
+        for future in in_flight:
+            imported += future.result()
+    
+    return imported
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export Learning Buddy users as JSONL")
+    parser.add_argument("--backend", choices=["json", "sqlite"], help="Storage backend (default: config.json)")
+    parser.add_argument("--location", help="user_profiles directory or SQLite database path")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    export_parser = subparsers.add_parser("export", help="Write every user to a JSONL file")
+    export_parser.add_argument("path", help="Output file (.jsonl or .jsonl.gz)")
+    
+    import_parser = subparsers.add_parser("import", help="Load users from a JSONL file")
+    import_parser.add_argument("path", help="Input file (.jsonl or .jsonl.gz)")
+    import_parser.add_argument("--batch-size", type=int, default=500, help="Users written per batch")
+    import_parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+    
+    if args.command == "export":
+        count = export_users(args.path, create_storage(args.backend, args.location))
+        print(f"✅ Exported {count} user(s) to {args.path}")
+    elif args.command == "import":
+        count = import_users(args.path, args.backend, args.location, args.batch_size, args.workers)
+        print(f"✅ Imported {count} user(s) from {args.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Configuration access for Learning Buddy System
+Reads config.json once per process
+"""
+
+import json
+import os
+from typing import Any, Dict
+
+CONFIG_FILE = "config.json"
+
+_config = None
+
+def load_config() -> Dict:
+    """Load config.json, caching the result for the rest of the process"""
+    global _config
+    if _config is None:
+        if os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, 'r') as f:
+                _config = json.load(f)
+        else:
+            _config = {}
+    return _config
+
+def get_setting(section: str, key: str, default: Any = None) -> Any:
+    """Get a single setting from a config section"""
+    return load_config().get(section, {}).get(key, default)
@@ -6,6 +6,10 @@ Demonstrates all features with sample data
 
 from learning_buddy import LearningBuddySystem
 from learning_analytics import LearningAnalytics
+from user_profile import get_profile_registry
+from quiz_prefetch import get_quiz_prefetch_pool
+from llm_cache import get_llm_cache
+from agent_pool import get_agent_pool
 import random
 
 def demo_learning_buddy():
@@ -41,8 +45,9 @@ def demo_learning_buddy():
         ("Linear Algebra", 75, 35),    # New topic
     ]
     
-    for topic, score, time_spent in demo_activities:
-        buddy.record_quiz_result(topic, score, time_spent)
+    with buddy.user_profile.batch_updates():
+        for topic, score, time_spent in demo_activities:
+            buddy.record_quiz_result(topic, score, time_spent)
     
     print("✅ Demo activities recorded!")
     
@@ -125,17 +130,18 @@ def performance_test():
         print(f"\nTesting user: {user}")
         buddy = LearningBuddySystem(user)
         
-        # Setup unique profile
-        buddy.user_profile.update_profile(
-            learning_style=learning_styles[i],
-            time_availability=random.randint(20, 60)
-        )
-        
-        # Record some activities
-        for _ in range(3):
-            topic = random.choice(["Math", "Science", "History"])
-            score = random.randint(60, 95)
-            buddy.record_quiz_result(topic, score)
+        with buddy.user_profile.batch_updates():
+            # Setup unique profile
+            buddy.user_profile.update_profile(
+                learning_style=learning_styles[i],
+                time_availability=random.randint(20, 60)
+            )
+            
+            # Record some activities
+            for _ in range(3):
+                topic = random.choice(["Math", "Science", "History"])
+                score = random.randint(60, 95)
+                buddy.record_quiz_result(topic, score)
         
         # Test analysis
         try:
@@ -144,6 +150,14 @@ def performance_test():
         except Exception as e:
             print(f"  ❌ Analysis failed for {user}: {e}")
     
+    print(f"\n📦 Profile cache: {get_profile_registry().stats()}")
+    quiz_pool = get_quiz_prefetch_pool()
+    if quiz_pool:
+        print(f"🗂️  Quiz prefetch pool: {quiz_pool.metrics()}")
+    response_cache = get_llm_cache()
+    if response_cache:
+        print(f"💾 LLM response cache: {response_cache.metrics()}")
+    print(f"🤖 Agent pool: {get_agent_pool().metrics()}")
     print("\n✅ Performance test complete!")
 
 def interactive_demo():
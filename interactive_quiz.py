@@ -4,11 +4,22 @@ Interactive Quiz System for Learning Buddy
 Provides real-time quiz experience with immediate feedback
 """
 
+import asyncio
 import json
-import random
 import time
-from typing import Dict, List, Any
-from user_profile import UserProfile
+from typing import Dict, List, Any, Optional, Set
+from config_loader import get_setting
+from question_bank import get_question_bank
+from user_profile import UserProfile, get_user_profile
+
+def normalize_answer(question: Dict, answer: str) -> Optional[str]:
+    """Canonical form of a typed answer ("B", "True"), or None if it is not a valid choice"""
+    answer = str(answer).strip().upper()
+    if question['type'] == 'true-false':
+        if answer in ['TRUE', 'T', 'FALSE', 'F']:
+            return 'True' if answer in ['TRUE', 'T'] else 'False'
+        return None
+    return answer if answer in ['A', 'B', 'C', 'D'] else None
 
 class InteractiveQuiz:
     """Interactive quiz system with real-time Q&A"""
@@ -21,241 +32,184 @@ class InteractiveQuiz:
         self.quiz_data = None
         
     def generate_quiz_questions(self, topic: str, num_questions: int = 5) -> List[Dict]:
-        """Generate quiz questions for a topic"""
-        mastery_level = self.user_profile.progress.get("mastery_levels", {}).get(topic, "beginner")
+        """Generate quiz questions for a topic, starting with questions due for review"""
+        mastery_level = self.user_profile.get_mastery_level(topic)
+        bank = get_question_bank()
         
-        # Sample quiz questions database - you can expand this
-        question_bank = {
-            "Machine Learning": {
-                "beginner": [
-                    {
-                        "type": "multiple-choice",
-                        "question": "What is Machine Learning?",
-                        "options": ["A) A programming language", "B) A subset of Artificial Intelligence", "C) A type of database", "D) A web framework"],
-                        "correct": "B",
-                        "explanation": "Machine Learning is a subset of Artificial Intelligence that enables computers to learn and make decisions from data without being explicitly programmed."
-                    },
-                    {
-                        "type": "multiple-choice", 
-                        "question": "Which of the following is a supervised learning algorithm?",
-                        "options": ["A) K-means clustering", "B) Linear Regression", "C) Principal Component Analysis", "D) Association Rules"],
-                        "correct": "B",
-                        "explanation": "Linear Regression is a supervised learning algorithm that predicts continuous values based on labeled training data."
-                    },
-                    {
-                        "type": "true-false",
-                        "question": "Machine Learning models can only work with numerical data.",
-                        "options": ["True", "False"],
-                        "correct": "False",
-                        "explanation": "Machine Learning models can work with various types of data including text, images, categorical data, and numerical data."
-                    },
-                    {
-                        "type": "multiple-choice",
-                        "question": "What is overfitting in Machine Learning?",
-                        "options": ["A) When a model performs well on training data but poorly on new data", "B) When a model is too simple", "C) When there's too little training data", "D) When the algorithm runs too fast"],
-                        "correct": "A",
-                        "explanation": "Overfitting occurs when a model learns the training data too well, including noise, making it perform poorly on new, unseen data."
-                    },
-                    {
-                        "type": "multiple-choice",
-                        "question": "Which of these is NOT a type of Machine Learning?",
-                        "options": ["A) Supervised Learning", "B) Unsupervised Learning", "C) Reinforcement Learning", "D) Deterministic Learning"],
-                        "correct": "D",
-                        "explanation": "Deterministic Learning is not a recognized type of Machine Learning. The main types are Supervised, Unsupervised, and Reinforcement Learning."
-                    }
-                ],
-                "intermediate": [
-                    {
-                        "type": "multiple-choice",
-                        "question": "What is the purpose of cross-validation?",
-                        "options": ["A) To increase training speed", "B) To assess model performance and prevent overfitting", "C) To reduce dataset size", "D) To normalize data"],
-                        "correct": "B",
-                        "explanation": "Cross-validation is used to assess how well a model will generalize to new data and helps prevent overfitting by testing on multiple data splits."
-                    },
-                    {
-                        "type": "multiple-choice",
-                        "question": "Which metric is most appropriate for evaluating a classification model with imbalanced classes?",
-                        "options": ["A) Accuracy", "B) F1-Score", "C) Mean Squared Error", "D) R-squared"],
-                        "correct": "B",
-                        "explanation": "F1-Score is better for imbalanced datasets as it considers both precision and recall, unlike accuracy which can be misleading."
-                    }
-                ]
-            },
-            "Python": {
-                "beginner": [
-                    {
-                        "type": "multiple-choice",
-                        "question": "What is the correct way to create a list in Python?",
-                        "options": ["A) list = {1, 2, 3}", "B) list = [1, 2, 3]", "C) list = (1, 2, 3)", "D) list = <1, 2, 3>"],
-                        "correct": "B",
-                        "explanation": "Lists in Python are created using square brackets []. Curly braces {} create sets or dictionaries, parentheses () create tuples."
-                    },
-                    {
-                        "type": "true-false",
-                        "question": "Python is case-sensitive.",
-                        "options": ["True", "False"],
-                        "correct": "True",
-                        "explanation": "Python is case-sensitive, meaning 'Variable' and 'variable' are treated as different identifiers."
-                    },
-                    {
-                        "type": "multiple-choice",
-                        "question": "Which of the following is used to define a function in Python?",
-                        "options": ["A) function", "B) def", "C) define", "D) func"],
-                        "correct": "B",
-                        "explanation": "The 'def' keyword is used to define functions in Python."
-                    }
-                ]
-            },
-            "Mathematics": {
-                "beginner": [
-                    {
-                        "type": "multiple-choice",
-                        "question": "What is the derivative of x²?",
-                        "options": ["A) x", "B) 2x", "C) x²", "D) 2"],
-                        "correct": "B",
-                        "explanation": "Using the power rule: d/dx(x²) = 2x¹ = 2x"
-                    },
-                    {
-                        "type": "true-false",
-                        "question": "The integral of a derivative gives back the original function (plus a constant).",
-                        "options": ["True", "False"],
-                        "correct": "True",
-                        "explanation": "This is the Fundamental Theorem of Calculus - integration and differentiation are inverse operations."
-                    }
-                ]
-            }
-        }
-        
-        # Get questions for the topic and level
-        topic_questions = question_bank.get(topic, {})
-        level_questions = topic_questions.get(mastery_level, [])
+        due_ids = self.user_profile.reviews.due_question_ids(topic, limit=num_questions)
+        questions = [bank.get(question_id) for question_id in due_ids if bank.get(question_id)]
+        if len(questions) < num_questions:
+            seen = {question["id"] for question in questions}
+            questions += bank.draw(topic, mastery_level, num_questions - len(questions), exclude=seen)
+        return questions
+    
+    def create_selector(self, topic: str):
+        """Adaptive selector for topics the question bank covers, if enabled"""
+        if not get_setting("adaptive_quiz", "enabled", True):
+            return None
+        # NumPy is only imported once a quiz actually selects adaptively
+        try:
+            from adaptive_selection import AdaptiveSelector
+        except ImportError:  # NumPy not installed: fall back to random draws
+            return None
+        selector = AdaptiveSelector(self.user_profile, topic)
+        return selector if selector.available() else None
+    
+    def iter_adaptive_questions(self, topic: str, num_questions: int, selector, asked: Set[str] = None):
+        """Due reviews first, then the most informative question until the ability estimate is precise
         
-        # If not enough questions for the level, mix with other levels
-        all_topic_questions = []
-        for level, questions in topic_questions.items():
-            all_topic_questions.extend(questions)
+        `asked` holds ids already served in this quiz (when resuming); they count towards num_questions.
+        """
+        bank = get_question_bank()
+        min_questions = get_setting("system_config", "min_quiz_questions", 3)
+        asked = set(asked or ())
         
-        if len(level_questions) < num_questions and all_topic_questions:
-            level_questions = all_topic_questions
+        for question_id in self.user_profile.reviews.due_question_ids(topic, limit=num_questions):
+            if len(asked) >= num_questions:
+                return
+            question = bank.get(question_id)
+            if question and question_id not in asked:
+                asked.add(question_id)
+                yield question
         
-        # If still no questions, create generic ones
-        if not level_questions:
-            level_questions = [
-                {
-                    "type": "multiple-choice",
-                    "question": f"Which of the following is most important when studying {topic}?",
-                    "options": ["A) Memorization", "B) Understanding concepts", "C) Speed", "D) Copying examples"],
-                    "correct": "B",
-                    "explanation": f"Understanding core concepts is crucial for mastering {topic}. This builds a strong foundation for advanced topics."
-                },
-                {
-                    "type": "true-false",
-                    "question": f"Regular practice is important for learning {topic}.",
-                    "options": ["True", "False"],
-                    "correct": "True",
-                    "explanation": f"Consistent practice helps reinforce concepts and build proficiency in {topic}."
-                }
-            ]
+        while len(asked) < num_questions:
+            if len(asked) >= min_questions and selector.confident():
+                return
+            question = selector.next_question(asked)
+            if question is None:
+                return
+            asked.add(question["id"])
+            yield question
+    
+    def run_interactive_quiz(self, topic: str, num_questions: int = 5, questions: List[Dict] = None):
+        """Run an interactive quiz session on the console, resuming a paused quiz on the topic if any
         
-        # Select random questions
-        selected_questions = random.sample(level_questions, min(num_questions, len(level_questions)))
-        return selected_questions
+        `questions` runs a given question set (e.g. a generated quiz) instead of drawing one.
+        """
+        # Imported here because the engine builds on this module
+        from quiz_engine import get_quiz_engine
+        return asyncio.run(self.run_console_client(get_quiz_engine(), topic, num_questions, questions))
     
-    def run_interactive_quiz(self, topic: str, num_questions: int = 5):
-        """Run an interactive quiz session"""
+    async def run_console_client(self, engine, topic: str, num_questions: int = 5,
+                                 questions: List[Dict] = None):
+        """Drive one quiz engine session from the console"""
         print(f"\n🧠 INTERACTIVE QUIZ: {topic}")
         print("=" * 50)
         
-        # Generate questions
-        questions = self.generate_quiz_questions(topic, num_questions)
-        if not questions:
+        # Continue a paused quiz before generating a new one
+        started = await engine.resume_session(self.user_profile.user_id, topic, user_profile=self.user_profile)
+        if started is None:
+            started = await engine.start_session(self.user_profile.user_id, topic, num_questions,
+                                                 user_profile=self.user_profile, questions=questions)
+        if started["question"] is None:
+            if "score" in started:
+                # A checkpointed quiz whose last answer was already in
+                self.total_questions = started["total"]
+                self.correct_answers = started["correct_count"]
+                self.show_quiz_results(topic, started["score"])
+                return started["score"]
             print("❌ Sorry, no questions available for this topic yet.")
             return
         
-        self.total_questions = len(questions)
-        self.correct_answers = 0
+        session_id = started["session_id"]
+        question = started["question"]
+        self.total_questions = question["max_questions"]
+        self.correct_answers = started.get("correct_count", 0)
+        
+        if started.get("resumed"):
+            print(f"⏯️  Resuming your paused quiz: {started['answered']} question(s) answered, "
+                  f"{self.correct_answers} correct")
         
         print(f"📚 Topic: {topic}")
-        print(f"📋 Questions: {self.total_questions}")
-        print(f"📊 Difficulty: {self.user_profile.progress.get('mastery_levels', {}).get(topic, 'beginner').title()}")
+        if started["adaptive"]:
+            print(f"📋 Questions: up to {self.total_questions} (stops early once your level is clear)")
+        else:
+            print(f"📋 Questions: {self.total_questions}")
+        print(f"📊 Difficulty: {self.user_profile.get_mastery_level(topic).title()}")
         print("\n🎯 Instructions:")
         print("• Answer each question by typing the letter (A, B, C, D) or True/False")
         print("• You'll get immediate feedback after each answer")
         print("• Your progress will be tracked automatically")
         
-        input("\n📖 Press Enter to start the quiz...")
+        # The console is the only client on this event loop, so blocking on input() is fine
+        if self.prompt("\n📖 Press Enter to start the quiz...") is None:
+            return await self.pause_console_quiz(engine, session_id)
         
         # Run through questions
-        for i, question in enumerate(questions, 1):
-            self.ask_question(i, question)
+        self.show_question(question)
+        engine.question_shown(session_id)
+        while True:
+            user_answer = self.prompt("\n💭 Your answer: ")
+            if user_answer is None:
+                return await self.pause_console_quiz(engine, session_id)
+            
+            feedback = await engine.answer(session_id, user_answer)
+            if not feedback["valid"]:
+                # Validate input
+                if question['type'] == 'true-false':
+                    print("❌ Please enter True/False or T/F")
+                else:
+                    print("❌ Please enter A, B, C, or D")
+                continue
+            
+            self.show_feedback(feedback)
+            question = feedback["question"]
+            if question is None:
+                break
+            
+            # Wait a moment before next question
+            if self.prompt("🔄 Press Enter for the next question...") is None:
+                return await self.pause_console_quiz(engine, session_id)
             print()  # Add spacing between questions
-        
-        # Calculate final score
-        score_percentage = (self.correct_answers / self.total_questions) * 100
+            self.show_question(question)
+            engine.question_shown(session_id)
+        print()
         
         # Show results
+        self.total_questions = feedback["total"]
+        score_percentage = feedback["score"]
         self.show_quiz_results(topic, score_percentage)
-        
-        # Record the result
-        time_spent = self.total_questions * 2  # Estimate 2 minutes per question
-        self.user_profile.record_activity(topic, score_percentage, time_spent)
-        
         return score_percentage
     
-    def ask_question(self, question_num: int, question_data: Dict):
-        """Ask a single question and get user response"""
-        print(f"\n📝 Question {question_num}/{self.total_questions}")
+    async def pause_console_quiz(self, engine, session_id: str):
+        """Keep the session's checkpoint so the same quiz resumes next time"""
+        await engine.pause(session_id)
+        print("\n⏸️  Quiz paused. Your progress has been saved.")
+        print("▶️  Start a quiz on the same topic to continue where you left off.")
+    
+    @staticmethod
+    def prompt(text: str) -> Optional[str]:
+        """Read a line from the console; None when input ends or is interrupted"""
+        try:
+            return input(text)
+        except (EOFError, KeyboardInterrupt):
+            return None
+    
+    def show_question(self, question: Dict):
+        """Print a question and its options"""
+        print(f"\n📝 Question {question['number']}/{self.total_questions}")
         print("-" * 30)
-        print(f"❓ {question_data['question']}")
+        print(f"❓ {question['question']}")
         print()
         
         # Display options
-        for option in question_data['options']:
+        for option in question['options']:
             print(f"   {option}")
-        
-        # Get user answer
-        while True:
-            try:
-                user_answer = input("\n💭 Your answer: ").strip().upper()
-                
-                # Validate input
-                if question_data['type'] == 'true-false':
-                    if user_answer in ['TRUE', 'T', 'FALSE', 'F']:
-                        user_answer = 'True' if user_answer in ['TRUE', 'T'] else 'False'
-                        break
-                    else:
-                        print("❌ Please enter True/False or T/F")
-                        continue
-                else:
-                    if user_answer in ['A', 'B', 'C', 'D']:
-                        break
-                    else:
-                        print("❌ Please enter A, B, C, or D")
-                        continue
-                        
-            except (EOFError, KeyboardInterrupt):
-                print("\n⏸️  Quiz paused. Your progress has been saved.")
-                return
-        
-        # Check answer
-        correct_answer = question_data['correct']
-        
-        if user_answer == correct_answer:
+    
+    def show_feedback(self, feedback: Dict):
+        """Print the verdict, explanation and running score for an answer"""
+        self.correct_answers = feedback["correct_count"]
+        if feedback["correct"]:
             print("✅ Correct! Well done!")
-            self.correct_answers += 1
         else:
-            print(f"❌ Incorrect. The correct answer is: {correct_answer}")
+            print(f"❌ Incorrect. The correct answer is: {feedback['correct_answer']}")
         
         # Show explanation
-        print(f"💡 Explanation: {question_data['explanation']}")
+        print(f"💡 Explanation: {feedback['explanation']}")
         
         # Show progress
-        current_score = (self.correct_answers / question_num) * 100
-        print(f"📊 Current Score: {self.correct_answers}/{question_num} ({current_score:.1f}%)")
-        
-        # Wait a moment before next question
-        if question_num < self.total_questions:
-            input("🔄 Press Enter for the next question...")
+        current_score = (self.correct_answers / feedback["answered"]) * 100
+        print(f"📊 Current Score: {self.correct_answers}/{feedback['answered']} ({current_score:.1f}%)")
     
     def show_quiz_results(self, topic: str, score_percentage: float):
         """Show final quiz results"""
@@ -328,7 +282,7 @@ def demo_interactive_quiz():
     print("=" * 30)
     
     # Create a demo user
-    user_profile = UserProfile("demo_user")
+    user_profile = get_user_profile("demo_user")
     quiz_system = InteractiveQuiz(user_profile)
     
     # Demo with Machine Learning quiz
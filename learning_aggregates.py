@@ -0,0 +1,109 @@
+"""
+Running learning aggregates for Learning Buddy System
+Kept up to date by UserProfile.record_activity so insights and summaries
+do not rescan every topic and score
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+MASTERY_LEVELS = ("advanced", "intermediate", "beginner", "struggling")
+
+def classify_topic(scores) -> Tuple[Optional[str], Optional[str]]:
+    """Classify a topic's trend and overall standing from its score series"""
+    trend = None
+    standing = None
+    count = scores.count
+    if count >= 3:
+        recent_avg = scores.window_mean(3)
+
+        if count > 3:
+            earlier_avg = (scores.total - recent_avg * 3) / (count - 3)
+
+            if recent_avg > earlier_avg + 10:
+                trend = "improving"
+            elif recent_avg < earlier_avg - 10:
+                trend = "declining"
+            else:
+                trend = "consistent"
+
+        # Overall performance classification
+        overall_avg = scores.mean()
+        if overall_avg >= 85:
+            standing = "top_performing"
+        elif overall_avg < 60:
+            standing = "struggling"
+
+    return trend, standing
+
+
+class LearningAggregates:
+    """Cross-topic counters, mastery histogram and per-topic classifications"""
+
+    __slots__ = ("total_quizzes", "total_score", "topic_levels", "topic_positions", "level_topics",
+                 "topic_classes")
+
+    def __init__(self):
+        self.total_quizzes = 0
+        self.total_score = 0.0
+        self.topic_levels = {}    # topic -> mastery level, in mastery_levels order
+        self.topic_positions = {}  # topic -> index in mastery_levels order
+        self.level_topics = {level: set() for level in MASTERY_LEVELS}
+        self.topic_classes = {}   # topic -> (trend, standing), in quiz_scores order
+
+    @classmethod
+    def rebuild(cls, progress) -> "LearningAggregates":
+        """Build aggregates from a progress document"""
+        aggregates = cls()
+        for topic, scores in progress.quiz_scores.items():
+            aggregates.total_quizzes += scores.count
+            aggregates.total_score += scores.total
+            aggregates.topic_classes[topic] = classify_topic(scores)
+        for topic, level in progress.mastery_levels.items():
+            aggregates.set_level(topic, level)
+        return aggregates
+
+    def observe(self, progress, record: Dict):
+        """Update aggregates after `record` has been applied to progress"""
+        topic = record["topic"]
+        if record["score"] is None:
+            return
+
+        scores = progress.quiz_scores[topic]
+        self.total_quizzes += 1
+        self.total_score += scores.scores[-1]
+        self.topic_classes[topic] = classify_topic(scores)
+        self.set_level(topic, progress.mastery_levels[topic])
+
+    def set_level(self, topic: str, level: str):
+        previous = self.topic_levels.get(topic)
+        if topic not in self.topic_positions:
+            self.topic_positions[topic] = len(self.topic_positions)
+        if previous in self.level_topics:
+            self.level_topics[previous].discard(topic)
+        if level in self.level_topics:
+            self.level_topics[level].add(topic)
+        self.topic_levels[topic] = level
+
+    @property
+    def mastery_histogram(self) -> Dict[str, int]:
+        return {level: len(topics) for level, topics in self.level_topics.items()}
+
+    def topics_at_level(self, level: str) -> List[str]:
+        """Topics currently at a mastery level, in mastery_levels order"""
+        topics = self.level_topics.get(level)
+        if not topics:
+            return []
+        return sorted(topics, key=self.topic_positions.__getitem__)
+
+    def average_score(self) -> float:
+        return self.total_score / self.total_quizzes if self.total_quizzes else 0
+
+    def snapshot(self) -> Dict:
+        """Plain-data view used for consistency checks"""
+        return {
+            "total_quizzes": self.total_quizzes,
+            "total_score": round(self.total_score, 6),
+            "mastery_histogram": self.mastery_histogram,
+            "topic_levels": dict(self.topic_levels),
+            "topic_classes": dict(self.topic_classes)
+        }
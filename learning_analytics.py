@@ -2,6 +2,8 @@ import json
 import os
 from datetime import datetime
 from typing import Dict, List
+from learning_aggregates import classify_topic
+from study_timing import average_session_minutes, latency_distribution, seconds_per_question
 
 class LearningAnalytics:
     """Advanced analytics for learning patterns and insights"""
@@ -36,39 +38,23 @@ class LearningAnalytics:
     def _get_learning_summary(self) -> Dict:
         """Get high-level learning summary"""
         progress = self.user_profile.progress
-        
-        total_quizzes = sum(len(scores) for scores in progress.get("quiz_scores", {}).values())
-        avg_score = 0
-        if total_quizzes > 0:
-            all_scores = []
-            for topic_scores in progress.get("quiz_scores", {}).values():
-                all_scores.extend([s["score"] for s in topic_scores])
-            avg_score = sum(all_scores) / len(all_scores)
+        aggregates = self.user_profile.aggregates
         
         return {
-            "total_topics": len(progress.get("current_topics", [])),
-            "total_quizzes_taken": total_quizzes,
-            "average_score": round(avg_score, 2),
-            "study_time_hours": round(progress.get("total_study_time", 0) / 60, 2),
-            "learning_streak": progress.get("learning_streaks", 0),
+            "total_topics": len(progress.current_topics),
+            "total_quizzes_taken": aggregates.total_quizzes,
+            "average_score": round(aggregates.average_score(), 2),
+            "study_time_hours": round(progress.total_study_time / 60, 2),
+            "learning_streak": progress.learning_streaks,
             "mastery_distribution": self._get_mastery_distribution()
         }
     
     def _get_mastery_distribution(self) -> Dict:
         """Get distribution of mastery levels"""
-        mastery_levels = self.user_profile.progress.get("mastery_levels", {})
-        distribution = {"advanced": 0, "intermediate": 0, "beginner": 0, "struggling": 0}
-        
-        for level in mastery_levels.values():
-            if level in distribution:
-                distribution[level] += 1
-        
-        return distribution
+        return self.user_profile.aggregates.mastery_histogram
     
     def _analyze_performance(self) -> Dict:
         """Analyze performance trends"""
-        quiz_scores = self.user_profile.progress.get("quiz_scores", {})
-        
         performance_analysis = {
             "improving_topics": [],
             "declining_topics": [],
@@ -77,48 +63,50 @@ class LearningAnalytics:
             "struggling_topics": []
         }
         
-        for topic, scores in quiz_scores.items():
-            if len(scores) >= 3:
-                recent_scores = [s["score"] for s in scores[-3:]]
-                earlier_scores = [s["score"] for s in scores[:-3]] if len(scores) > 3 else []
-                
-                if earlier_scores:
-                    recent_avg = sum(recent_scores) / len(recent_scores)
-                    earlier_avg = sum(earlier_scores) / len(earlier_scores)
-                    
-                    if recent_avg > earlier_avg + 10:
-                        performance_analysis["improving_topics"].append(topic)
-                    elif recent_avg < earlier_avg - 10:
-                        performance_analysis["declining_topics"].append(topic)
-                    else:
-                        performance_analysis["consistent_topics"].append(topic)
-                
-                # Overall performance classification
-                overall_avg = sum(s["score"] for s in scores) / len(scores)
-                if overall_avg >= 85:
-                    performance_analysis["top_performing_topics"].append(topic)
-                elif overall_avg < 60:
-                    performance_analysis["struggling_topics"].append(topic)
+        for topic, (trend, standing) in self.user_profile.aggregates.topic_classes.items():
+            if trend:
+                performance_analysis[f"{trend}_topics"].append(topic)
+            if standing == "top_performing":
+                performance_analysis["top_performing_topics"].append(topic)
+            elif standing == "struggling":
+                performance_analysis["struggling_topics"].append(topic)
         
         return performance_analysis
     
+    def analyze_topic(self, topic: str) -> Dict:
+        """Analyze performance for a single topic"""
+        scores = self.user_profile.get_topic_scores(topic)
+        trend, standing = classify_topic(scores)
+        return {
+            "topic": topic,
+            "mastery_level": self.user_profile.get_mastery_level(topic),
+            "quizzes_taken": scores.count,
+            "average_score": round(scores.mean(), 2),
+            "trend": trend,
+            "standing": standing
+        }
+    
     def _analyze_time_patterns(self) -> Dict:
         """Analyze study time patterns"""
+        progress = self.user_profile.progress
         return {
-            "preferred_study_duration": self.user_profile.profile.get("time_availability", 30),
-            "total_study_time": self.user_profile.progress.get("total_study_time", 0),
-            "average_session_length": 15,  # Default assumption
+            "preferred_study_duration": self.user_profile.profile.time_availability,
+            "total_study_time": progress.total_study_time,
+            "average_session_length": average_session_minutes(progress),  # None until a session is timed
+            "timed_sessions": len(progress.session_times),
+            "seconds_per_question": round(seconds_per_question(progress), 1),
+            "question_response_times": latency_distribution(progress),
             "consistency_rating": self.user_profile.calculate_consistency()
         }
     
     def _track_difficulty_progression(self) -> Dict:
         """Track how user progresses through difficulty levels"""
-        mastery_levels = self.user_profile.progress.get("mastery_levels", {})
+        distribution = self.user_profile.aggregates.mastery_histogram
         
         progression = {
-            "topics_mastered": len([t for t, l in mastery_levels.items() if l == "advanced"]),
-            "topics_in_progress": len([t for t, l in mastery_levels.items() if l in ["intermediate", "beginner"]]),
-            "topics_struggling": len([t for t, l in mastery_levels.items() if l == "struggling"])
+            "topics_mastered": distribution["advanced"],
+            "topics_in_progress": distribution["intermediate"] + distribution["beginner"],
+            "topics_struggling": distribution["struggling"]
         }
         
         return progression
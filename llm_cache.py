@@ -0,0 +1,162 @@
+"""
+LLM response cache for Learning Buddy System
+Crew results are stored on disk under a hash of (agent role, model, temperature,
+normalized task text), so an identical request is answered without an LLM call;
+entries expire after a per-method TTL and the least recently used ones are
+evicted past the size limits
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from config_loader import get_setting
+
+CACHE_DIR = os.path.join("data", "llm_cache")
+MAX_ENTRIES = 2000
+MAX_MB = 50
+DEFAULT_TTL = 86400  # seconds, for methods without a ttl of their own
+
+def normalize_task(text: str) -> str:
+    """Task text with indentation and line-wrapping differences removed"""
+    return " ".join(text.split())
+
+def cache_key(role: str, model: str, temperature: float, task_text: str) -> str:
+    content = "\x1f".join([role, str(model), str(temperature), normalize_task(task_text)])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Content-addressed crew responses on disk with per-method TTLs and LRU eviction"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_entries: int = None, max_mb: float = None,
+                 ttls: Dict[str, float] = None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries or get_setting("llm_cache", "max_entries", MAX_ENTRIES)
+        self.max_bytes = (max_mb or get_setting("llm_cache", "max_mb", MAX_MB)) * 1024 * 1024
+        self.ttls = ttls if ttls is not None else get_setting("llm_cache", "ttl_seconds", {})
+        self.entries = OrderedDict()  # key -> file size, least recently used first
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+        self.hits: Dict[str, int] = {}    # per method
+        self.misses: Dict[str, int] = {}
+        self.expired = 0
+        self.stores = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0          # LLM time the hits would have taken
+        self._scan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _scan(self):
+        """Rebuild the LRU order from file modification times, which every hit bumps"""
+        found = []
+        if os.path.isdir(self.cache_dir):
+            for shard in os.scandir(self.cache_dir):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        found.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.total_bytes += size
+
+    def ttl(self, method: str) -> float:
+        """Seconds a method's responses stay valid; 0 turns caching off for it"""
+        return self.ttls.get(method, DEFAULT_TTL)
+
+    def get(self, key: str, method: str) -> Optional[str]:
+        """The cached response, or None when missing, expired or unreadable"""
+        with self.lock:
+            response = self._lookup(key, method)
+            counts = self.misses if response is None else self.hits
+            counts[method] = counts.get(method, 0) + 1
+            return response
+
+    def _lookup(self, key: str, method: str) -> Optional[str]:
+        if key not in self.entries or self.ttl(method) <= 0:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._remove(key)
+            return None
+        if time.time() - entry["created"] > self.ttl(method):
+            self._remove(key)
+            self.expired += 1
+            return None
+        self.entries.move_to_end(key)
+        os.utime(path)
+        self.saved_seconds += entry.get("seconds", 0.0)
+        return entry["response"]
+
+    def put(self, key: str, method: str, response: str, seconds: float = 0.0):
+        """Store a response that took `seconds` to generate, evicting old entries past the limits"""
+        if not response or self.ttl(method) <= 0:
+            return
+        path = self._path(key)
+        data = json.dumps({"method": method, "created": time.time(), "seconds": round(seconds, 3),
+                           "response": response}, separators=(',', ':'))
+        with self.lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w', encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+            self.total_bytes += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            self.stores += 1
+            while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        self.total_bytes -= self.entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.entries):
+                self._remove(key)
+
+    def metrics(self) -> Dict:
+        with self.lock:
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            return {
+                "entries": len(self.entries),
+                "size_mb": round(self.total_bytes / (1024 * 1024), 2),
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "expired": self.expired,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "saved_seconds": round(self.saved_seconds, 1),
+                "by_method": {method: {"hits": self.hits.get(method, 0), "misses": self.misses.get(method, 0)}
+                              for method in sorted(set(self.hits) | set(self.misses))}
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Process-wide response cache, or None when llm_cache.enabled is off"""
+    global _cache
+    with _cache_lock:
+        if _cache is None and get_setting("llm_cache", "enabled", True):
+            _cache = LLMResponseCache()
+        return _cache
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+LLM call metrics for Learning Buddy System
+Every agent call is recorded to a rolling JSONL file with its method, agent
+role, outcome (LLM call, cache hit or failure), wall time, time to first
+token and prompt/completion tokens; `python llm_metrics.py` reports
+p50/p95/p99 latencies and token use per operation
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+from config_loader import get_setting
+from prompt_context import estimate_tokens
+from study_timing import percentile
+
+METRICS_FILE = os.path.join("reports", "llm_metrics.jsonl")
+MAX_MB = 5
+BACKUPS = 3  # rotated files kept: llm_metrics.jsonl.1 (newest) .. .3 (oldest)
+
+# Outcomes
+LLM_CALL = "llm"
+CACHE_HIT = "cache_hit"
+FAILED = "error"
+
+
+class LLMCall:
+    """Measurements of one agent call, filled in while it runs"""
+
+    __slots__ = ("method", "agent", "role", "started", "first_token", "outcome", "prompt_tokens",
+                 "completion_tokens", "token_source", "error")
+
+    def __init__(self, method: str, agent: str, role: str):
+        self.method = method
+        self.agent = agent
+        self.role = role
+        self.started = time.monotonic()
+        self.first_token = None
+        self.outcome = LLM_CALL
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.token_source = None
+        self.error = None
+
+    def cache_hit(self):
+        self.outcome = CACHE_HIT
+
+    def token_usage(self, usage: Dict, output, prompt: str):
+        """Tokens of this call as measured by the agent pool, or estimated from the text without them"""
+        if usage:
+            self.prompt_tokens = usage["prompt_tokens"]
+            self.completion_tokens = usage["completion_tokens"]
+            self.token_source = "usage"
+        else:
+            self.prompt_tokens = estimate_tokens(prompt)
+            self.completion_tokens = estimate_tokens(str(output))
+            self.token_source = "estimate"
+
+    def record(self) -> Dict:
+        ended = time.monotonic()
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "method": self.method,
+            "agent": self.agent,
+            "role": self.role,
+            "outcome": self.outcome,
+            "wall_ms": round((ended - self.started) * 1000, 1),
+            "ttft_ms": round((self.first_token - self.started) * 1000, 1) if self.first_token else None
+        }
+        if self.prompt_tokens is not None:
+            record.update(prompt_tokens=self.prompt_tokens, completion_tokens=self.completion_tokens,
+                          token_source=self.token_source)
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+# Calls in progress by thread, for attributing streamed chunks
+_active: Dict[int, LLMCall] = {}
+_active_lock = threading.Lock()
+
+def first_token_seen():
+    """Mark the first streamed chunk of the calling thread's LLM call (or the only call running)"""
+    with _active_lock:
+        call = _active.get(threading.get_ident())
+        if call is None and len(_active) == 1:
+            call = next(iter(_active.values()))
+    if call is not None and call.first_token is None:
+        call.first_token = time.monotonic()
+
+def install_stream_listener() -> bool:
+    """Time first tokens from crewai's stream chunk events; needs llm_config.stream"""
+    try:
+        try:
+            from crewai.events import LLMStreamChunkEvent, crewai_event_bus
+        except ImportError:
+            from crewai.utilities.events import crewai_event_bus
+            from crewai.utilities.events.llm_events import LLMStreamChunkEvent
+    except ImportError:
+        return False
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def on_chunk(source, event):
+        first_token_seen()
+    return True
+
+
+class LLMMetricsLog:
+    """Rolling JSONL file of LLM call records"""
+
+    def __init__(self, path: str = None, max_mb: float = None, backups: int = None, enabled: bool = None):
+        self.path = path or get_setting("llm_metrics", "path", METRICS_FILE)
+        self.max_bytes = (max_mb or get_setting("llm_metrics", "max_mb", MAX_MB)) * 1024 * 1024
+        self.backups = backups if backups is not None else get_setting("llm_metrics", "backups", BACKUPS)
+        self.enabled = enabled if enabled is not None else get_setting("llm_metrics", "enabled", True)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def call(self, method: str, agent: str, role: str) -> Iterator[LLMCall]:
+        """Measure one agent call; failures are recorded and re-raised"""
+        call = LLMCall(method, agent, role)
+        thread = threading.get_ident()
+        with _active_lock:
+            _active[thread] = call
+        try:
+            yield call
+        except Exception as e:
+            call.outcome = FAILED
+            call.error = type(e).__name__
+            raise
+        finally:
+            with _active_lock:
+                _active.pop(thread, None)
+            if self.enabled:
+                self.write(call.record())
+
+    def write(self, record: Dict):
+        line = json.dumps(record, separators=(',', ':')) + "\n"
+        with self.lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.path, 'a', encoding="utf-8") as f:
+                f.write(line)
+
+    def _rotate(self):
+        """Shift llm_metrics.jsonl -> .1 -> .2 ..., dropping the oldest"""
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def files(self) -> List[str]:
+        """Metrics files, oldest first"""
+        paths = [f"{self.path}.{i}" for i in range(self.backups, 0, -1)] + [self.path]
+        return [path for path in paths if os.path.exists(path)]
+
+    def records(self, since: datetime = None) -> Iterator[Dict]:
+        cutoff = since.isoformat() if since else None
+        for path in self.files():
+            with open(path, 'r', encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash
+                    if cutoff is None or record["ts"] >= cutoff:
+                        yield record
+
+
+def _percentiles(values: List[float]) -> Dict:
+    return {f"p{p}": percentile(values, p) for p in (50, 95, 99)}
+
+def summarize(records: Iterator[Dict], group_by: str = "method") -> Dict[str, Dict]:
+    """Per-operation call counts, cache hits, failures, latency percentiles and token totals
+
+    Latency and token figures cover calls that reached the LLM; cache hits are counted separately.
+    """
+    groups: Dict[str, Dict] = {}
+    for record in records:
+        group = groups.setdefault(record.get(group_by) or "unknown", {
+            "calls": 0, "llm": 0, "cache_hits": 0, "errors": 0,
+            "wall_ms": [], "ttft_ms": [], "prompt_tokens": [], "completion_tokens": [], "hit_ms": []
+        })
+        group["calls"] += 1
+        if record["outcome"] == CACHE_HIT:
+            group["cache_hits"] += 1
+            group["hit_ms"].append(record["wall_ms"])
+        elif record["outcome"] == FAILED:
+            group["errors"] += 1
+        else:
+            group["llm"] += 1
+            group["wall_ms"].append(record["wall_ms"])
+            if record.get("ttft_ms") is not None:
+                group["ttft_ms"].append(record["ttft_ms"])
+            if record.get("prompt_tokens") is not None:
+                group["prompt_tokens"].append(record["prompt_tokens"])
+                group["completion_tokens"].append(record["completion_tokens"])
+
+    summary = {}
+    for name, group in sorted(groups.items()):
+        summary[name] = {
+            "calls": group["calls"],
+            "llm_calls": group["llm"],
+            "cache_hits": group["cache_hits"],
+            "cache_hit_rate": group["cache_hits"] / group["calls"],
+            "errors": group["errors"],
+            "wall_ms": _percentiles(group["wall_ms"]),
+            "ttft_ms": _percentiles(group["ttft_ms"]),
+            "cache_hit_ms": _percentiles(group["hit_ms"]),
+            "prompt_tokens": {"total": sum(group["prompt_tokens"]), **_percentiles(group["prompt_tokens"])},
+            "completion_tokens": {"total": sum(group["completion_tokens"]),
+                                  **_percentiles(group["completion_tokens"])}
+        }
+    return summary
+
+
+_log = None
+_log_lock = threading.Lock()
+
+def get_llm_metrics() -> LLMMetricsLog:
+    """Process-wide metrics log shared by every LearningBuddySystem"""
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = LLMMetricsLog()
+        return _log
+
+
+def _fmt(stats: Dict, unit: str = "") -> str:
+    if stats["p50"] is None:
+        return "-"
+    return " / ".join(f"{stats[p]:.1f}{unit}" if stats[p] < 10 else f"{stats[p]:.0f}{unit}"
+                      for p in ("p50", "p95", "p99"))
+
+def print_report(summary: Dict[str, Dict], group_by: str):
+    print(f"📈 LLM CALL METRICS by {group_by} (p50 / p95 / p99)")
+    print("=" * 50)
+    if not summary:
+        print("No LLM calls recorded yet")
+        return
+    for name, stats in summary.items():
+        print(f"\n🔹 {name}: {stats['calls']} call(s), {stats['llm_calls']} to the LLM, "
+              f"{stats['cache_hits']} cache hit(s) ({stats['cache_hit_rate']:.0%}), {stats['errors']} failed")
+        print(f"  ⏱️  Wall time: {_fmt(stats['wall_ms'], ' ms')}")
+        print(f"  ⚡ Time to first token: {_fmt(stats['ttft_ms'], ' ms')}")
+        print(f"  💾 Cache hit time: {_fmt(stats['cache_hit_ms'], ' ms')}")
+        print(f"  🔤 Prompt tokens: {_fmt(stats['prompt_tokens'])} (total {stats['prompt_tokens']['total']})")
+        print(f"  ✍️  Completion tokens: {_fmt(stats['completion_tokens'])} "
+              f"(total {stats['completion_tokens']['total']})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize recorded LLM call latency and token use")
+    parser.add_argument("--by", default="method", choices=["method", "role", "agent"],
+                        help="Group calls by method, agent role or agent name")
+    parser.add_argument("--hours", type=float, help="Only include calls from the last N hours")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    since = datetime.now() - timedelta(hours=args.hours) if args.hours else None
+    summary = summarize(get_llm_metrics().records(since), args.by)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary, args.by)
+
+if __name__ == "__main__":
+    main()
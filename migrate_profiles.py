@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Migration tool for Learning Buddy user data
+Copies existing user_profiles/*.json files into the SQLite backend, or moves
+them from the flat directory into the hash-sharded layout
+"""
+
+import argparse
+import os
+import sys
+
+from profile_storage import JSONFileStorage, create_storage
+from user_profile import UserProfile
+
+def migrate_json_to_sqlite(source_dir: str = "user_profiles",
+                           db_path: str = "user_profiles/learning_buddy.db") -> int:
+    """Copy every JSON user (snapshot plus activity log) into SQLite
+    
+    The source is read with the configured profile_layout; a listed user whose
+    files cannot be read stops the migration rather than copying empty defaults.
+    """
+    source = create_storage("json", source_dir)
+    target = create_storage("sqlite", db_path)
+    migrated = 0
+    
+    try:
+        for user_id in source.list_user_ids():
+            if not (os.path.exists(source.profile_file(user_id)) or os.path.exists(source.progress_file(user_id))):
+                raise FileNotFoundError(f"No profile or progress files found for {user_id} in {source_dir}/ "
+                                        f"({source.layout} layout)")
+            user_profile = UserProfile(user_id, storage=source)
+            target.save_users([{
+                "user_id": user_id,
+                "profile": user_profile.profile.encode(),
+                "progress": user_profile.encode_progress()
+            }])
+            migrated += 1
+            print(f"  ✓ Migrated {user_id}")
+    finally:
+        target.close()
+    
+    return migrated
+
+def migrate_flat_to_sharded(base_dir: str = "user_profiles") -> int:
+    """Move flat user_profiles/<id>_* files into user_profiles/ab/cd/"""
+    return JSONFileStorage(base_dir, layout="sharded").migrate_to_sharded()
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate Learning Buddy user data")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    sqlite_parser = subparsers.add_parser("sqlite", help="Copy JSON users into the SQLite backend")
+    sqlite_parser.add_argument("--source", default="user_profiles", help="Directory holding *_profile.json / *_progress.json")
+    sqlite_parser.add_argument("--db", default="user_profiles/learning_buddy.db", help="SQLite database to write")
+    
+    shard_parser = subparsers.add_parser("shard", help="Move flat JSON users into the hash-sharded layout")
+    shard_parser.add_argument("--source", default="user_profiles", help="Directory holding *_profile.json / *_progress.json")
+    args = parser.parse_args()
+    
+    if args.command == "sqlite":
+        print(f"📦 Migrating {args.source}/ into {args.db}...")
+        try:
+            count = migrate_json_to_sqlite(args.source, args.db)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ Migrated {count} user(s)")
+        print("Set system_config.storage_backend to \"sqlite\" in config.json to use it.")
+    elif args.command == "shard":
+        print(f"📦 Sharding {args.source}/...")
+        count = migrate_flat_to_sharded(args.source)
+        print(f"✅ Moved {count} user(s) into {args.source}/ab/cd/ directories")
+
+if __name__ == "__main__":
+    main()
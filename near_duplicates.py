@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate question detection for Learning Buddy System
+Each question's text is shingled and summarized as a MinHash signature; the
+signatures are split into locality-sensitive hashing (LSH) bands, so reworded
+copies of a question share a bucket and are found without comparing every
+pair of questions
+"""
+
+import argparse
+import json
+import os
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config_loader import get_setting
+from question_bank import GENERATED_QUESTIONS_FILE, QuestionBank, get_question_bank, normalize_topic
+
+NUM_PERM = 64
+BANDS = 16
+THRESHOLD = 0.7
+SHINGLE_SIZE = 5          # bytes per shingle; at most 8 so a shingle packs into one uint64
+SEED = 1
+CHUNK_SHINGLES = 200_000  # shingles hashed per vectorized step, bounds memory use
+GOLDEN = np.uint64(0x9E3779B97F4A7C15)  # Fibonacci hashing multiplier
+
+_non_word = re.compile(r"[\W_]+")
+
+def question_text(question: Dict) -> str:
+    """Text compared for near-duplicates: the question and the text of its correct answer"""
+    correct = str(question.get("correct", ""))
+    answer = next((option for option in question.get("options", [])
+                   if str(option).startswith(correct + ")")), correct)
+    return f"{question['question']} {answer}"
+
+def shingles(texts: List[str], size: int = SHINGLE_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """Byte shingles of each normalized text packed into uint64s, concatenated, plus each text's offset
+
+    Repeated shingles are kept: they do not change a minimum.
+    """
+    encoded = [_non_word.sub(" ", text.casefold()).strip().encode("utf-8").ljust(size) for text in texts]
+    lengths = np.array([len(data) for data in encoded])
+    windows = lengths - size + 1
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+    packed = np.zeros(len(data) - size + 1, dtype=np.uint64)
+    for j in range(size):
+        packed |= data[j:len(data) - size + 1 + j] << np.uint64(8 * (size - 1 - j))
+
+    # Keep the windows that lie inside a single text
+    offsets = np.r_[0, np.cumsum(windows)[:-1]]
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    positions = np.repeat(starts - offsets, windows) + np.arange(windows.sum())
+    return packed[positions], offsets
+
+
+class MinHasher:
+    """MinHash signatures: shingles are mixed to 32 bits once, then permuted by num_perm
+    odd-multiplier affine maps (a * x + b) mod 2**32, which stay in fast uint32 arithmetic
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = SEED):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = (rng.randint(0, 2 ** 31, size=num_perm, dtype=np.uint32) << np.uint32(1)) | np.uint32(1)
+        self.b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64).astype(np.uint32)
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), num_perm) uint32 signatures, computed in chunks of whole texts"""
+        result = np.empty((self.num_perm, len(texts)), dtype=np.uint32)
+        values, offsets = shingles(texts)
+        mixed = ((values * GOLDEN) >> np.uint64(32)).astype(np.uint32)
+        bounds = np.r_[offsets, len(mixed)]
+        start = 0
+        while start < len(texts):
+            # As many whole texts as fit in one chunk, and at least one
+            end = int(np.searchsorted(bounds, bounds[start] + CHUNK_SHINGLES, side="right")) - 1
+            end = min(max(end, start + 1), len(texts))
+            # (num_perm, shingles) so each permutation's values are contiguous for the reduction
+            hashed = self.a[:, None] * mixed[None, bounds[start]:bounds[end]]
+            hashed += self.b[:, None]
+            result[:, start:end] = np.minimum.reduceat(hashed, offsets[start:end] - bounds[start], axis=1)
+            start = end
+        return result.T.copy()
+
+    def signature(self, text: str) -> np.ndarray:
+        return self.signatures([text])[0]
+
+
+class BandHasher:
+    """64-bit LSH bucket keys for each band of a signature, scoped to the question's topic"""
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = SEED):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.multipliers = np.random.RandomState(seed + 1).randint(
+            1, 2 ** 31, size=self.rows).astype(np.uint64) * np.uint64(2 ** 31 + 1)
+
+    def keys(self, signatures: np.ndarray, topics: List[str]) -> np.ndarray:
+        """(len(signatures), bands) bucket keys; integer arithmetic wraps modulo 2**64"""
+        topic_keys = np.array([zlib.crc32(normalize_topic(topic).encode("utf-8")) for topic in topics],
+                              dtype=np.uint64)
+        blocks = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows)
+        return (blocks * self.multipliers).sum(axis=2) ^ (topic_keys[:, None] << np.uint64(32))
+
+
+def _similarity(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """Estimated Jaccard similarity: the share of matching MinHash values"""
+    return float(np.mean(signature_a == signature_b))
+
+def find_near_duplicates(questions: List[Dict], threshold: float = None,
+                         num_perm: int = None, bands: int = None) -> List[Tuple[int, int, float]]:
+    """(duplicate index, kept index, similarity) for every question that nearly repeats an earlier one
+
+    Candidates sharing an LSH bucket are confirmed by signature similarity and
+    grouped into clusters; the earliest question of each cluster is kept.
+    """
+    threshold = threshold or get_setting("near_duplicates", "threshold", THRESHOLD)
+    num_perm = num_perm or get_setting("near_duplicates", "num_perm", NUM_PERM)
+    bands = bands or get_setting("near_duplicates", "bands", BANDS)
+    if len(questions) < 2:
+        return []
+
+    signatures = MinHasher(num_perm).signatures([question_text(q) for q in questions])
+    keys = BandHasher(num_perm, bands).keys(signatures, [q["topic"] for q in questions])
+
+    candidates = []
+    for band in range(bands):
+        # A stable sort puts each bucket's earliest question first; pair the others with it
+        order = np.argsort(keys[:, band], kind="stable")
+        sorted_keys = keys[order, band]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        firsts = np.repeat(order[starts], np.diff(np.r_[starts, len(order)]))
+        shared = firsts != order
+        candidates.append(np.stack([order[shared], firsts[shared]], axis=1))
+    candidates = np.unique(np.concatenate(candidates), axis=0)
+    if not len(candidates):
+        return []
+
+    similarity = (signatures[candidates[:, 0]] == signatures[candidates[:, 1]]).mean(axis=1)
+    confirmed = candidates[similarity >= threshold]
+
+    # Union-find over confirmed pairs; the root is always the smallest index
+    parent = {}
+    def root(i):
+        while parent.get(i, i) != i:
+            parent[i] = parent.get(parent[i], parent[i])
+            i = parent[i]
+        return i
+    for duplicate, kept in confirmed.tolist():
+        a, b = root(duplicate), root(kept)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+
+    duplicates = []
+    for i in sorted(parent):
+        kept = root(i)
+        duplicates.append((i, kept, _similarity(signatures[i], signatures[kept])))
+    return duplicates
+
+
+class NearDuplicateIndex:
+    """LSH index over the bank's questions for checking new questions before they are added"""
+
+    def __init__(self, bank: QuestionBank, threshold: float = None):
+        self.bank = bank
+        self.threshold = threshold or get_setting("near_duplicates", "threshold", THRESHOLD)
+        num_perm = get_setting("near_duplicates", "num_perm", NUM_PERM)
+        self.hasher = MinHasher(num_perm)
+        self.band_hasher = BandHasher(num_perm, get_setting("near_duplicates", "bands", BANDS))
+        self.ids: List[str] = []
+        self.signatures: List[np.ndarray] = []  # one row per indexed question
+        self.buckets: Dict[int, List[int]] = {}  # band key -> rows
+        self.sync()
+
+    def sync(self):
+        """Index questions added to the bank since the last sync"""
+        new = self.bank.questions[len(self.ids):]
+        if new:
+            self._index(new, self.hasher.signatures([question_text(q) for q in new]))
+
+    def _index(self, questions: List[Dict], signatures: np.ndarray):
+        start = len(self.ids)
+        self.ids.extend(question["id"] for question in questions)
+        self.signatures.extend(signatures)
+        keys = self.band_hasher.keys(signatures, [question["topic"] for question in questions])
+        for row, row_keys in enumerate(keys.tolist(), start):
+            for key in row_keys:
+                self.buckets.setdefault(key, []).append(row)
+
+    def find(self, question: Dict) -> Optional[Tuple[str, float]]:
+        """(id, similarity) of the most similar indexed question at or above the threshold"""
+        signature = self.hasher.signature(question_text(question))
+        keys = self.band_hasher.keys(signature[None, :], [question["topic"]])[0]
+        rows = {row for key in keys.tolist() for row in self.buckets.get(key, ())}
+        best = None
+        for row in rows:
+            similarity = _similarity(signature, self.signatures[row])
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (self.ids[row], similarity)
+        return best
+
+
+_index = None
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    """Index over the shared question bank, built once per process"""
+    global _index
+    if _index is None:
+        _index = NearDuplicateIndex(get_question_bank())
+    else:
+        _index.sync()
+    return _index
+
+
+def remove_generated_duplicates(duplicates: List[Tuple[int, int, float]], bank: QuestionBank,
+                                path: str = GENERATED_QUESTIONS_FILE) -> int:
+    """Rewrite the generated questions file without near-duplicates; curated questions are kept"""
+    drop = {bank.questions[duplicate]["id"] for duplicate, _, _ in duplicates
+            if "generated" in bank.questions[duplicate].get("tags", [])}
+    if not drop or not os.path.exists(path):
+        return 0
+    with open(path, 'r', encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    kept = [line for line in lines if json.loads(line).get("id") not in drop]
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding="utf-8") as f:
+        f.writelines(kept)
+    os.replace(tmp_path, path)
+    return len(lines) - len(kept)
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate questions in the question bank")
+    parser.add_argument("--threshold", type=float, help="Minimum estimated Jaccard similarity")
+    parser.add_argument("--apply", action="store_true",
+                        help="Remove near-duplicate generated questions from the generated questions file")
+    parser.add_argument("--show", type=int, default=10, help="Number of duplicate pairs to print")
+    args = parser.parse_args()
+
+    bank = get_question_bank()
+    duplicates = find_near_duplicates(bank.questions, args.threshold)
+    print(f"🔍 {len(duplicates)} near-duplicate(s) among {len(bank)} questions")
+    for duplicate, kept, similarity in duplicates[:args.show]:
+        print(f"  • {bank.questions[duplicate]['question']!r}")
+        print(f"    ≈ {bank.questions[kept]['question']!r} ({similarity:.0%})")
+    if args.apply:
+        removed = remove_generated_duplicates(duplicates, bank)
+        print(f"🧹 Removed {removed} generated question(s) from {GENERATED_QUESTIONS_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Storage backends for user profiles and progress
+JSON files (default) or a single SQLite database with indexed score history
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config_loader import get_setting
+from score_series import ScoreRollup, ScoreSeries, compact_json_default
+
+# Number of activity log entries to accumulate before the progress snapshot
+# is rewritten and the log truncated.
+ACTIVITY_LOG_COMPACT_EVERY = 200
+
+
+USER_FILE_SUFFIXES = ("_profile.json", "_progress.json", "_activity.log")
+
+def shard_dir(base_dir: str, user_id: str) -> str:
+    """Hash-sharded directory for a user: <base_dir>/ab/cd"""
+    digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()
+    return os.path.join(base_dir, digest[:2], digest[2:4])
+
+
+class JSONFileStorage:
+    """Two JSON files per user plus an append-only activity log
+
+    With the "sharded" layout files live under user_profiles/ab/cd/ (from a
+    hash of the user id); users still in the legacy flat layout are read and
+    written in place until migrated.
+    """
+
+    # Per-topic lookups are served from the in-memory progress document
+    indexed = False
+
+    def __init__(self, base_dir: str = "user_profiles", layout: str = "flat"):
+        self.base_dir = base_dir
+        self.layout = layout
+        self.pending_log_entries = {}
+        self.user_dirs = {}
+        self.created_dirs = set()
+
+    def user_dir(self, user_id: str) -> str:
+        """Directory holding a user's files, resolved once per user"""
+        directory = self.user_dirs.get(user_id)
+        if directory is None:
+            directory = self.base_dir
+            if self.layout == "sharded":
+                directory = shard_dir(self.base_dir, user_id)
+                if not self._has_user_files(directory, user_id) and self._has_user_files(self.base_dir, user_id):
+                    directory = self.base_dir
+            self.user_dirs[user_id] = directory
+        return directory
+
+    @staticmethod
+    def _has_user_files(directory: str, user_id: str) -> bool:
+        return any(os.path.exists(os.path.join(directory, f"{user_id}{suffix}"))
+                   for suffix in ("_profile.json", "_progress.json"))
+
+    def _writable_path(self, user_id: str, suffix: str) -> str:
+        directory = self.user_dir(user_id)
+        if directory not in self.created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self.created_dirs.add(directory)
+        return os.path.join(directory, f"{user_id}{suffix}")
+
+    def profile_file(self, user_id: str) -> str:
+        return os.path.join(self.user_dir(user_id), f"{user_id}_profile.json")
+
+    def progress_file(self, user_id: str) -> str:
+        return os.path.join(self.user_dir(user_id), f"{user_id}_progress.json")
+
+    def activity_log_file(self, user_id: str) -> str:
+        return os.path.join(self.user_dir(user_id), f"{user_id}_activity.log")
+
+    def load_profile(self, user_id: str) -> Optional[Dict]:
+        """Load a stored profile, or None if the user has none"""
+        path = self.profile_file(user_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def load_progress(self, user_id: str) -> Optional[Dict]:
+        """Load the progress snapshot, or None if the user has none"""
+        path = self.progress_file(user_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def load_activity_log(self, user_id: str, after_seq: int) -> List[Dict]:
+        """Return logged activity records newer than the snapshot"""
+        records = []
+        path = self.activity_log_file(user_id)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn final line from an interrupted write
+                        continue
+                    if record["n"] > after_seq:
+                        records.append(record)
+        self.pending_log_entries[user_id] = len(records)
+        return records
+
+    def save_profile(self, user_id: str, profile: Dict):
+        with open(self._writable_path(user_id, "_profile.json"), 'w') as f:
+            json.dump(profile, f, indent=2)
+
+    def save_progress(self, user_id: str, progress: Dict):
+        """Save a full progress snapshot and truncate the activity log"""
+        path = self._writable_path(user_id, "_progress.json")
+        tmp_file = path + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(progress, f, indent=2, default=compact_json_default)
+        os.replace(tmp_file, path)
+
+        # Every logged entry is now part of the snapshot
+        log_file = self.activity_log_file(user_id)
+        if os.path.exists(log_file):
+            open(log_file, 'w').close()
+        self.pending_log_entries[user_id] = 0
+
+    def append_activity(self, user_id: str, progress: Dict, record: Dict):
+        """Append one compact activity record to the user's log"""
+        self.append_activities(user_id, progress, [record])
+
+    def append_activities(self, user_id: str, progress: Dict, records: List[Dict]):
+        """Append several activity records to the user's log in one write"""
+        lines = "".join(json.dumps(record, separators=(',', ':')) + "\n" for record in records)
+        with open(self._writable_path(user_id, "_activity.log"), 'ab+') as f:
+            # A torn final line from an interrupted write must not swallow the next record
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    lines = "\n" + lines
+            f.write(lines.encode("utf-8"))
+        pending = self.pending_log_entries.get(user_id, 0) + len(records)
+        self.pending_log_entries[user_id] = pending
+
+        if pending >= ACTIVITY_LOG_COMPACT_EVERY:
+            self.save_progress(user_id, progress)
+
+    def append_activity_batches(self, batches: List[Tuple[str, Dict, List[Dict]]]):
+        """Append (user_id, progress, records) batches for several users"""
+        for user_id, progress, records in batches:
+            self.append_activities(user_id, progress, records)
+
+    def list_user_ids(self) -> List[str]:
+        """List every user with stored data, in either layout"""
+        return sorted(self.iter_user_ids())
+
+    def iter_user_ids(self) -> Iterator[str]:
+        """Yield every user with stored data, one directory at a time"""
+        for _, _, names in os.walk(self.base_dir):
+            user_ids = set()
+            for name in names:
+                for suffix in USER_FILE_SUFFIXES:
+                    if name.endswith(suffix):
+                        user_ids.add(name[:-len(suffix)])
+            yield from sorted(user_ids)
+
+    def save_users(self, users: List[Dict]):
+        """Write many users' profile and progress"""
+        for user in users:
+            self.save_profile(user["user_id"], user["profile"])
+            self.save_progress(user["user_id"], user["progress"])
+
+    def migrate_to_sharded(self) -> int:
+        """Move flat-layout user files into their shard directories"""
+        moved_users = set()
+        if not os.path.isdir(self.base_dir):
+            return 0
+        for name in os.listdir(self.base_dir):
+            for suffix in USER_FILE_SUFFIXES:
+                if name.endswith(suffix):
+                    user_id = name[:-len(suffix)]
+                    target_dir = shard_dir(self.base_dir, user_id)
+                    os.makedirs(target_dir, exist_ok=True)
+                    os.replace(os.path.join(self.base_dir, name), os.path.join(target_dir, name))
+                    moved_users.add(user_id)
+                    self.user_dirs.pop(user_id, None)
+        return len(moved_users)
+
+
+class SQLiteStorage:
+    """SQLite backend (WAL mode) with quiz scores indexed on (user_id, topic, date)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS profiles (
+            user_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS progress (
+            user_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS quiz_scores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            topic TEXT NOT NULL,
+            score REAL NOT NULL,
+            date TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_quiz_scores_user_topic_date
+            ON quiz_scores (user_id, topic, date);
+        CREATE TABLE IF NOT EXISTS score_rollups (
+            user_id TEXT NOT NULL,
+            topic TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (user_id, topic)
+        );
+        CREATE TABLE IF NOT EXISTS mastery_levels (
+            user_id TEXT NOT NULL,
+            topic TEXT NOT NULL,
+            level TEXT NOT NULL,
+            PRIMARY KEY (user_id, topic)
+        );
+    """
+
+    indexed = True
+
+    def __init__(self, db_path: str = "user_profiles/learning_buddy.db"):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def load_profile(self, user_id: str) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data FROM profiles WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_progress(self, user_id: str) -> Optional[Dict]:
+        """Assemble the progress document from its tables"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data FROM progress WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            score_rows = self.conn.execute(
+                "SELECT topic, score, date FROM quiz_scores WHERE user_id = ? ORDER BY id",
+                (user_id,)
+            ).fetchall()
+            mastery_rows = self.conn.execute(
+                "SELECT topic, level FROM mastery_levels WHERE user_id = ? ORDER BY rowid",
+                (user_id,)
+            ).fetchall()
+            rollup_rows = self.conn.execute(
+                "SELECT topic, data FROM score_rollups WHERE user_id = ?", (user_id,)
+            ).fetchall()
+
+        progress = json.loads(row[0])
+        progress["quiz_scores"] = {}
+        for topic, score, date in score_rows:
+            if topic not in progress["quiz_scores"]:
+                progress["quiz_scores"][topic] = ScoreSeries()
+            progress["quiz_scores"][topic].append(score, date)
+        for topic, data in rollup_rows:
+            rollup = ScoreRollup.from_dict(json.loads(data))
+            scores = progress["quiz_scores"].get(topic) or ScoreSeries()
+            progress["quiz_scores"][topic] = ScoreSeries(scores.scores, scores.timestamps, rollup)
+        progress["mastery_levels"] = {topic: level for topic, level in mastery_rows}
+        return progress
+
+    def load_activity_log(self, user_id: str, after_seq: int) -> List[Dict]:
+        """Every activity is committed directly, so there is nothing to replay"""
+        return []
+
+    def save_profile(self, user_id: str, profile: Dict):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO profiles (user_id, data) VALUES (?, ?)",
+                (user_id, json.dumps(profile))
+            )
+
+    def save_progress(self, user_id: str, progress: Dict):
+        """Replace all stored progress for a user"""
+        with self.lock, self.conn:
+            self._write_progress(user_id, progress)
+
+    def save_users(self, users: List[Dict]):
+        """Write many users' profile and progress in one transaction"""
+        with self.lock, self.conn:
+            for user in users:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO profiles (user_id, data) VALUES (?, ?)",
+                    (user["user_id"], json.dumps(user["profile"]))
+                )
+                self._write_progress(user["user_id"], user["progress"])
+
+    def _write_progress(self, user_id: str, progress: Dict):
+        self.conn.execute("DELETE FROM quiz_scores WHERE user_id = ?", (user_id,))
+        self.conn.execute("DELETE FROM mastery_levels WHERE user_id = ?", (user_id,))
+        self.conn.execute("DELETE FROM score_rollups WHERE user_id = ?", (user_id,))
+        self.conn.executemany(
+            "INSERT INTO quiz_scores (user_id, topic, score, date) VALUES (?, ?, ?, ?)",
+            [(user_id, topic, s["score"], s["date"])
+             for topic, scores in progress.get("quiz_scores", {}).items()
+             for s in scores]
+        )
+        self.conn.executemany(
+            "INSERT INTO score_rollups (user_id, topic, data) VALUES (?, ?, ?)",
+            [(user_id, topic, json.dumps(scores.rollup.to_dict()))
+             for topic, scores in progress.get("quiz_scores", {}).items()
+             if getattr(scores, "rollup", None)]
+        )
+        self.conn.executemany(
+            "INSERT INTO mastery_levels (user_id, topic, level) VALUES (?, ?, ?)",
+            [(user_id, topic, level) for topic, level in progress.get("mastery_levels", {}).items()]
+        )
+        self._write_progress_meta(user_id, progress)
+
+    def _write_progress_meta(self, user_id: str, progress: Dict):
+        meta = {k: v for k, v in progress.items() if k not in ("quiz_scores", "mastery_levels")}
+        self.conn.execute(
+            "INSERT OR REPLACE INTO progress (user_id, data) VALUES (?, ?)",
+            (user_id, json.dumps(meta))
+        )
+
+    def append_activity(self, user_id: str, progress: Dict, record: Dict):
+        """Insert one score row and update the touched mastery level"""
+        self.append_activities(user_id, progress, [record])
+
+    def append_activities(self, user_id: str, progress: Dict, records: List[Dict]):
+        """Insert score rows and update touched mastery levels in one transaction"""
+        self.append_activity_batches([(user_id, progress, records)])
+
+    def append_activity_batches(self, batches: List[Tuple[str, Dict, List[Dict]]]):
+        """Append (user_id, progress, records) batches for several users in one transaction"""
+        with self.lock, self.conn:
+            for user_id, progress, records in batches:
+                scored = [r for r in records if r["score"] is not None]
+                touched = {r["topic"] for r in scored}
+                self.conn.executemany(
+                    "INSERT INTO quiz_scores (user_id, topic, score, date) VALUES (?, ?, ?, ?)",
+                    [(user_id, r["topic"], r["score"], r["date"]) for r in scored]
+                )
+                self.conn.executemany(
+                    "INSERT INTO mastery_levels (user_id, topic, level) VALUES (?, ?, ?) "
+                    "ON CONFLICT (user_id, topic) DO UPDATE SET level = excluded.level",
+                    [(user_id, topic, progress["mastery_levels"][topic]) for topic in touched]
+                )
+                self._write_rollups(user_id, progress, touched)
+                self._write_progress_meta(user_id, progress)
+
+    def _write_rollups(self, user_id: str, progress: Dict, topics):
+        """Store the rollups of compacted topics and drop the score rows folded into them"""
+        for topic in topics:
+            scores = progress["quiz_scores"].get(topic)
+            if getattr(scores, "rollup", None) is None:
+                continue
+            self.conn.execute(
+                "INSERT INTO score_rollups (user_id, topic, data) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id, topic) DO UPDATE SET data = excluded.data",
+                (user_id, topic, json.dumps(scores.rollup.to_dict()))
+            )
+            # The raw scores still held in memory are the newest rows
+            self.conn.execute(
+                "DELETE FROM quiz_scores WHERE user_id = ? AND topic = ? AND id NOT IN "
+                "(SELECT id FROM quiz_scores WHERE user_id = ? AND topic = ? ORDER BY id DESC LIMIT ?)",
+                (user_id, topic, user_id, topic, len(scores.scores))
+            )
+
+    def topic_scores(self, user_id: str, topic: str) -> ScoreSeries:
+        """Score history for one topic via the (user_id, topic, date) index"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT score, date FROM quiz_scores WHERE user_id = ? AND topic = ? ORDER BY date",
+                (user_id, topic)
+            ).fetchall()
+            rollup_row = self.conn.execute(
+                "SELECT data FROM score_rollups WHERE user_id = ? AND topic = ?", (user_id, topic)
+            ).fetchone()
+        scores = ScoreSeries(rollup=ScoreRollup.from_dict(json.loads(rollup_row[0])) if rollup_row else None)
+        for score, date in rows:
+            scores.append(score, date)
+        return scores
+
+    def mastery_level(self, user_id: str, topic: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT level FROM mastery_levels WHERE user_id = ? AND topic = ?",
+                (user_id, topic)
+            ).fetchone()
+        return row[0] if row else None
+
+    def list_user_ids(self) -> List[str]:
+        return list(self.iter_user_ids())
+
+    def iter_user_ids(self, page_size: int = 1000) -> Iterator[str]:
+        """Yield every user id in order, one page of rows at a time"""
+        last_user_id = ""
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT user_id FROM (SELECT user_id FROM profiles UNION SELECT user_id FROM progress) "
+                    "WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                    (last_user_id, page_size)
+                ).fetchall()
+            if not rows:
+                return
+            for (user_id,) in rows:
+                yield user_id
+            last_user_id = rows[-1][0]
+
+
+def create_storage(backend: str = None, location: str = None):
+    """Create a storage backend; unspecified settings come from config.json"""
+    backend = backend or get_setting("system_config", "storage_backend", "json")
+    if backend == "sqlite":
+        db_path = location or get_setting("system_config", "sqlite_path", "user_profiles/learning_buddy.db")
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        return SQLiteStorage(db_path)
+    return JSONFileStorage(
+        location or "user_profiles",
+        layout=get_setting("system_config", "profile_layout", "flat")
+    )
+
+
+_default_storage = None
+
+def get_default_storage():
+    """Return the process-wide storage backend selected in config.json"""
+    global _default_storage
+    if _default_storage is None:
+        _default_storage = create_storage()
+    return _default_storage
@@ -0,0 +1,176 @@
+"""
+Prompt context for Learning Buddy System
+Summarizes a learner's history for LLM prompts as per-topic aggregates,
+trends and a short window of recent scores, fitted to the token budget in
+llm_config.max_tokens, so prompts stay the same size however long the
+history grows
+"""
+
+import math
+import re
+from typing import List
+from config_loader import get_setting
+from score_series import from_epoch_micros
+from study_timing import average_session_minutes, seconds_per_question
+
+MAX_TOKENS = 2000
+RECENT_WINDOWS = (5, 3, 1)  # recent scores shown per topic, shrunk until the context fits
+MAX_LIST_ITEMS = 5          # goals, interests, strengths and weaknesses shown per list
+SCAFFOLD_RESERVE = 0.25     # share of the budget left for crewai's own prompt scaffolding
+
+_pieces = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for Llama-style tokenizers: a word or punctuation mark is at least
+    one token and English averages about four characters per token"""
+    return max(math.ceil(len(text) / 4), len(_pieces.findall(text)))
+
+def prompt_budget() -> int:
+    """Token budget for one prompt (task text plus agent role, goal and backstory)"""
+    return int(get_setting("llm_config", "max_tokens", MAX_TOKENS) * (1 - SCAFFOLD_RESERVE))
+
+def remaining_budget(*fixed_parts: str, budget: int = None) -> int:
+    """Tokens left for variable context once the fixed parts of a prompt are counted"""
+    budget = budget if budget is not None else prompt_budget()
+    return budget - sum(estimate_tokens(part) for part in fixed_parts)
+
+def clip_to_budget(lines: List[str], budget: int) -> str:
+    """Join lines, dropping trailing ones and cutting the last kept line so the text fits `budget`"""
+    text = "\n".join(lines)
+    if estimate_tokens(text) <= budget:
+        return text
+    kept = []
+    for line in lines:
+        if estimate_tokens("\n".join(kept + [line])) <= budget:
+            kept.append(line)
+            continue
+        # Longest prefix of the line that still fits
+        low, high = 0, len(line)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if estimate_tokens("\n".join(kept + [line[:middle] + "..."])) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        if low:
+            kept.append(line[:low] + "...")
+        break
+    return "\n".join(kept)
+
+def _list_line(label: str, values: List, budget: int) -> str:
+    """`label: a, b, c (+N more)` with as many values as fit in `budget` tokens, or None"""
+    shown = [str(value) for value in values[:MAX_LIST_ITEMS]]
+    while shown:
+        more = len(values) - len(shown)
+        line = f"{label}: {', '.join(shown)}" + (f" (+{more} more)" if more else "")
+        if estimate_tokens(line) <= budget:
+            return line
+        shown.pop()
+    return None
+
+def _score(value: float) -> str:
+    return f"{value:.0f}" if value == int(value) else f"{value:.1f}"
+
+def _topic_line(topic: str, scores, level: str, trend: str, window: int) -> str:
+    parts = [f"- {topic}: {level}"]
+    if scores is not None and scores.count:
+        low, high = min(scores.scores), max(scores.scores)
+        if scores.rollup:
+            low, high = min(low, scores.rollup.min), max(high, scores.rollup.max)
+        parts.append(f"{scores.count} quizzes, avg {scores.mean():.1f}, range {_score(low)}-{_score(high)}")
+        if trend:
+            parts.append(trend)
+        if window:
+            recent = ", ".join(_score(score) for score in scores.scores[-window:])
+            parts.append(f"recent [{recent}]")
+        parts.append(f"last {from_epoch_micros(scores.timestamps[-1])[:10]}")
+    else:
+        parts.append("no quizzes yet")
+    return ", ".join(parts)
+
+def _topic_priority(user_profile, focus_topic: str = None) -> List[str]:
+    """Focus topic first, then struggling topics, then the most recently quizzed"""
+    progress = user_profile.progress
+    topics = list(dict.fromkeys(progress.current_topics + list(progress.quiz_scores)))
+    struggling = set(user_profile.aggregates.topics_at_level("struggling"))
+
+    def recency(topic):
+        scores = progress.quiz_scores.get(topic)
+        return scores.timestamps[-1] if scores is not None and len(scores) else 0
+
+    topics.sort(key=lambda topic: (topic != focus_topic, topic not in struggling, -recency(topic)))
+    return topics
+
+def build_progress_context(user_profile, focus_topic: str = None, budget: int = None) -> str:
+    """Compact summary of the learner's profile and progress within `budget` tokens
+
+    Goals, interests, strengths and weaknesses are capped to a few items. Recent
+    score windows shrink first; if the topics still do not fit, the lowest-priority
+    ones are left out and summarized in a closing line. Whatever still exceeds the
+    budget (a very small one) is cut from the end.
+    """
+    budget = budget if budget is not None else prompt_budget()
+    profile = user_profile.profile
+    progress = user_profile.progress
+    aggregates = user_profile.aggregates
+    insights = user_profile.get_learning_insights()
+
+    header = [
+        f"Learner: {profile.learning_style} learner, prefers {profile.preferred_explanation_style} explanations, "
+        f"{profile.time_availability} min/day, difficulty preference {profile.difficulty_preference}",
+        f"Totals: {insights['total_topics']} topics, {aggregates.total_quizzes} quizzes, "
+        f"avg score {aggregates.average_score():.1f}, {insights['study_time_hours']} study hours, "
+        f"consistency {insights['learning_consistency']}, last activity {(progress.last_activity or 'never')[:10]}",
+        "Mastery: " + ", ".join(f"{level} {count}" for level, count in aggregates.mastery_histogram.items())
+    ]
+    timing = []
+    if progress.session_times:
+        timing.append(f"{average_session_minutes(progress)} min per session")
+    if progress.response_times:
+        timing.append(f"{seconds_per_question(progress):.0f} s per question (median)")
+    if timing:
+        header.append(f"Timing: {', '.join(timing)}")
+    topics_label = "Topics (level, quizzes, average, range, trend, recent scores oldest first, last quiz):"
+    remaining = budget - estimate_tokens("\n".join(header + [topics_label]))
+    for name in ("goals", "interests", "strengths", "weaknesses"):
+        values = getattr(profile, name)
+        if values:
+            # Each list gets at most a quarter of what is left so the topics keep most of the budget
+            line = _list_line(name.title(), values, remaining // 4)
+            if line:
+                header.append(line)
+                remaining -= estimate_tokens(line)
+    header.append(topics_label)
+
+    topics = _topic_priority(user_profile, focus_topic)
+
+    def topic_lines(window: int) -> List[str]:
+        return [_topic_line(topic, progress.quiz_scores.get(topic), aggregates.topic_levels.get(topic, "beginner"),
+                            aggregates.topic_classes.get(topic, (None, None))[0], window)
+                for topic in topics]
+
+    for window in RECENT_WINDOWS:
+        lines = topic_lines(window)
+        if estimate_tokens("\n".join(lines)) <= remaining:
+            return clip_to_budget(header + lines, budget)
+
+    # Even one recent score per topic is too much: keep the highest-priority topics that fit
+    suffix_quizzes, suffix_total = [0] * (len(topics) + 1), [0.0] * (len(topics) + 1)
+    for i in range(len(topics) - 1, -1, -1):
+        scores = progress.quiz_scores.get(topics[i])
+        suffix_quizzes[i] = suffix_quizzes[i + 1] + (scores.count if scores is not None else 0)
+        suffix_total[i] = suffix_total[i + 1] + (scores.total if scores is not None else 0.0)
+
+    def omitted_line(start: int) -> str:
+        quizzes = suffix_quizzes[start]
+        average = suffix_total[start] / quizzes if quizzes else 0
+        return f"- ...and {len(topics) - start} more topics ({quizzes} quizzes, avg {average:.1f})"
+
+    kept, used = [], 0
+    for i, line in enumerate(lines):
+        tokens = estimate_tokens(line)
+        if used + tokens + estimate_tokens(omitted_line(i + 1)) > remaining:
+            return clip_to_budget(header + kept + [omitted_line(i)], budget)
+        kept.append(line)
+        used += tokens
+    return clip_to_budget(header + kept, budget)
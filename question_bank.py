@@ -0,0 +1,140 @@
+"""
+Question bank for Learning Buddy System
+Curated questions live in data/question_bank.json and ingested LLM questions in
+data/generated_questions.jsonl; both are loaded and indexed once per process
+by (normalized topic, level) and by tag
+"""
+
+import hashlib
+import json
+import os
+import random
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+QUESTION_BANK_FILE = os.path.join("data", "question_bank.json")
+GENERATED_QUESTIONS_FILE = os.path.join("data", "generated_questions.jsonl")
+
+def normalize_topic(topic: str) -> str:
+    """Index key for a topic: case-insensitive, whitespace-collapsed"""
+    return " ".join(topic.split()).casefold()
+
+def _normalize_text(text: str) -> str:
+    return " ".join(str(text).split()).casefold()
+
+def content_hash(question: Dict) -> str:
+    """Identity of a question: topic, wording, options and answer, ignoring case and spacing"""
+    content = "\x1f".join([
+        normalize_topic(question["topic"]),
+        _normalize_text(question["question"]),
+        *(_normalize_text(option) for option in question["options"]),
+        _normalize_text(question["correct"])
+    ])
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+def generic_questions(topic: str) -> List[Dict]:
+    """Fallback questions for topics the bank does not cover yet"""
+    return [
+        {
+            "type": "multiple-choice",
+            "question": f"Which of the following is most important when studying {topic}?",
+            "options": ["A) Memorization", "B) Understanding concepts", "C) Speed", "D) Copying examples"],
+            "correct": "B",
+            "explanation": f"Understanding core concepts is crucial for mastering {topic}. This builds a strong foundation for advanced topics."
+        },
+        {
+            "type": "true-false",
+            "question": f"Regular practice is important for learning {topic}.",
+            "options": ["True", "False"],
+            "correct": "True",
+            "explanation": f"Consistent practice helps reinforce concepts and build proficiency in {topic}."
+        }
+    ]
+
+
+class QuestionBank:
+    """Questions indexed by (normalized topic, level), by topic and by tag"""
+
+    def __init__(self, questions: List[Dict] = None):
+        self.questions = []
+        self.by_id = {}
+        self.by_topic_level = defaultdict(list)
+        self.by_topic = defaultdict(list)
+        self.by_tag = defaultdict(list)
+        for question in questions or []:
+            self.add(question)
+
+    @classmethod
+    def load(cls, path: str = QUESTION_BANK_FILE,
+             generated_path: str = GENERATED_QUESTIONS_FILE) -> "QuestionBank":
+        bank = cls()
+        if os.path.exists(path):
+            with open(path, 'r', encoding="utf-8") as f:
+                for question in json.load(f)["questions"]:
+                    bank.add(question)
+        if os.path.exists(generated_path):
+            with open(generated_path, 'r', encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        bank.add(json.loads(line))
+        return bank
+
+    def add(self, question: Dict) -> bool:
+        """Index a question carrying "topic", "level" and optional "tags" keys
+
+        Returns False when a question with the same content is already indexed.
+        """
+        question_id = question.setdefault("id", content_hash(question))
+        if question_id in self.by_id:
+            return False
+        self.by_id[question_id] = question
+
+        topic = normalize_topic(question["topic"])
+        self.questions.append(question)
+        self.by_topic_level[(topic, question["level"])].append(question)
+        self.by_topic[topic].append(question)
+        for tag in question.get("tags", ()):
+            self.by_tag[tag.casefold()].append(question)
+        return True
+
+    def draw(self, topic: str, level: str, count: int, exclude: Set[str] = frozenset()) -> List[Dict]:
+        """Random questions for a topic, preferring the learner's level, skipping `exclude` ids"""
+        key = normalize_topic(topic)
+        pool = self.by_topic_level.get((key, level), [])
+
+        # If not enough questions for the level, mix with other levels
+        if len(pool) < count:
+            pool = self.by_topic.get(key) or pool
+
+        # If still no questions, fall back to generic ones
+        if not pool:
+            pool = generic_questions(topic)
+
+        if not exclude:
+            return random.sample(pool, min(count, len(pool)))
+        candidates = random.sample(pool, min(count + len(exclude), len(pool)))
+        return [question for question in candidates if question.get("id") not in exclude][:count]
+
+    def get(self, question_id: str) -> Optional[Dict]:
+        return self.by_id.get(question_id)
+
+    def draw_by_tag(self, tag: str, count: int) -> List[Dict]:
+        pool = self.by_tag.get(tag.casefold(), [])
+        return random.sample(pool, min(count, len(pool)))
+
+    def topics(self) -> List[str]:
+        """Topic names as written in the bank, one per normalized topic"""
+        return [questions[0]["topic"] for questions in self.by_topic.values()]
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+
+_question_bank = None
+
+def get_question_bank() -> QuestionBank:
+    """Load the question bank once per process"""
+    global _question_bank
+    if _question_bank is None:
+        _question_bank = QuestionBank.load()
+    return _question_bank
@@ -0,0 +1,189 @@
+"""
+Headless quiz API for Learning Buddy System
+Serves question sets with a session id and grades whole answer sheets in one
+call, singly or in batches across many users, without any console I/O
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+from interactive_quiz import InteractiveQuiz, normalize_answer
+from user_profile import batch_profile_updates, get_user_profile
+
+SESSION_TTL = 3600  # seconds an unsubmitted question set stays gradable
+
+AnswerSheet = Union[Dict[str, str], List[str]]
+
+
+class QuizSession:
+    """Questions served to one user, awaiting their answer sheet"""
+
+    __slots__ = ("session_id", "user_id", "topic", "questions", "started")
+
+    def __init__(self, user_id: str, topic: str, questions: List[Dict]):
+        self.session_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.topic = topic
+        self.questions = questions
+        self.started = time.monotonic()
+
+    def question_key(self, number: int) -> str:
+        """Answer-sheet key of a question: its bank id, or its position for generic questions"""
+        return self.questions[number - 1].get("id") or f"q{number}"
+
+
+class QuizService:
+    """Non-interactive quiz serving and grading"""
+
+    def __init__(self, session_ttl: int = SESSION_TTL):
+        self.session_ttl = session_ttl
+        self.sessions = OrderedDict()  # session_id -> QuizSession, oldest first
+        self.lock = threading.Lock()
+
+    def start_quiz(self, user_id: str, topic: str, num_questions: int = 5) -> Dict:
+        """Pick questions for a user and return them without answers"""
+        user_profile = get_user_profile(user_id)
+        questions = InteractiveQuiz(user_profile).generate_quiz_questions(topic, num_questions)
+        session = QuizSession(user_id, topic, questions)
+        with self.lock:
+            self._expire_sessions()
+            self.sessions[session.session_id] = session
+
+        return {
+            "session_id": session.session_id,
+            "topic": topic,
+            "questions": [
+                {
+                    "key": session.question_key(number),
+                    "number": number,
+                    "type": question["type"],
+                    "question": question["question"],
+                    "options": question["options"]
+                }
+                for number, question in enumerate(questions, 1)
+            ]
+        }
+
+    def _expire_sessions(self):
+        cutoff = time.monotonic() - self.session_ttl
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.started >= cutoff:
+                break
+            self.sessions.popitem(last=False)
+
+    def _take_session(self, session_id: str, answers: AnswerSheet = None) -> QuizSession:
+        """Remove a session for grading; with `answers`, only if the sheet answers something
+
+        An empty sheet leaves the session open, so the learner can still submit their answers.
+        """
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is not None and answers is not None and not self.answered_count(session, answers):
+                raise ValueError(f"Answer sheet for quiz session {session_id} has no valid answers")
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            raise KeyError(f"Unknown or expired quiz session: {session_id}")
+        return session
+
+    @staticmethod
+    def answered_count(session: QuizSession, answers: AnswerSheet) -> int:
+        """Questions on the sheet with a valid answer"""
+        if isinstance(answers, dict):
+            raws = [answers.get(session.question_key(number)) for number in range(1, len(session.questions) + 1)]
+        else:
+            raws = list(answers[:len(session.questions)])
+        return sum(raw is not None and normalize_answer(question, raw) is not None
+                   for question, raw in zip(session.questions, raws))
+
+    @staticmethod
+    def grade_answers(session: QuizSession, answers: AnswerSheet) -> Dict:
+        """Grade an answer sheet keyed by question key (or listed in question order)"""
+        results = []
+        correct_count = 0
+        for number, question in enumerate(session.questions, 1):
+            key = session.question_key(number)
+            if isinstance(answers, dict):
+                raw = answers.get(key)
+            else:
+                raw = answers[number - 1] if number <= len(answers) else None
+            answer = normalize_answer(question, raw) if raw is not None else None
+            correct = answer is not None and answer == question["correct"]
+            correct_count += correct
+            results.append({
+                "key": key,
+                "answer": answer,
+                "correct": correct,
+                "correct_answer": question["correct"],
+                "explanation": question["explanation"]
+            })
+
+        total = len(session.questions)
+        return {
+            "session_id": session.session_id,
+            "user_id": session.user_id,
+            "topic": session.topic,
+            "correct": correct_count,
+            "total": total,
+            "score": (correct_count / total) * 100 if total else 0,
+            "results": results
+        }
+
+    @staticmethod
+    def _record(user_profile, session: QuizSession, result: Dict, duration_seconds: Optional[float]):
+        """Record the graded quiz as an activity and update the review schedule"""
+        if duration_seconds is None:
+            duration_seconds = time.monotonic() - session.started
+        result["time_spent_minutes"] = round(duration_seconds / 60, 2)
+
+        user_profile.record_activity(session.topic, result["score"], result["time_spent_minutes"])
+        for question, graded in zip(session.questions, result["results"]):
+            # Unanswered questions are neither right nor wrong for scheduling
+            if "id" in question and graded["answer"] is not None:
+                user_profile.reviews.record_review(question["id"], session.topic, graded["correct"])
+
+    def submit_answers(self, session_id: str, answers: AnswerSheet,
+                       duration_seconds: float = None) -> Dict:
+        """Grade one answer sheet and record it; the duration defaults to time since start_quiz
+
+        Raises KeyError for an unknown or expired session and ValueError for a sheet without a
+        single valid answer, which would otherwise be recorded as a 0% quiz.
+        """
+        session = self._take_session(session_id, answers)
+        result = self.grade_answers(session, answers)
+        user_profile = get_user_profile(session.user_id)
+        self._record(user_profile, session, result, duration_seconds)
+        user_profile.reviews.save()
+        return result
+
+    def submit_batch(self, sheets: List[Dict]) -> List[Dict]:
+        """Grade many {"session_id", "answers", "duration_seconds"?} sheets, writing progress in grouped updates
+
+        Unknown or expired sessions and empty sheets yield {"session_id", "error"} entries instead
+        of failing the batch.
+        """
+        graded = []
+        results = []
+        for sheet in sheets:
+            try:
+                session = self._take_session(sheet["session_id"], sheet["answers"])
+            except (KeyError, ValueError) as e:
+                results.append({"session_id": sheet["session_id"], "error": e.args[0]})
+                continue
+            result = self.grade_answers(session, sheet["answers"])
+            graded.append((session, result, sheet.get("duration_seconds")))
+            results.append(result)
+
+        profiles = {}
+        for session, _, _ in graded:
+            if session.user_id not in profiles:
+                profiles[session.user_id] = get_user_profile(session.user_id)
+
+        with batch_profile_updates(list(profiles.values())):
+            for session, result, duration_seconds in graded:
+                self._record(profiles[session.user_id], session, result, duration_seconds)
+        for user_profile in profiles.values():
+            user_profile.reviews.save()
+        return results
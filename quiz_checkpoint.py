@@ -0,0 +1,61 @@
+"""
+Quiz checkpoints for Learning Buddy System
+An unfinished quiz's question set, answers and timings are written after every
+answer, so a paused, expired or crashed session resumes where it stopped
+without drawing or generating its questions again
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+from question_bank import normalize_topic
+
+CHECKPOINT_DIR = "learning_data"
+
+
+class QuizCheckpointStore:
+    """Per-user file of unfinished quizzes, one per topic"""
+
+    def __init__(self, user_id: str, checkpoint_dir: str = CHECKPOINT_DIR):
+        self.path = os.path.join(checkpoint_dir, f"{user_id}_quiz_checkpoints.json")
+        self.checkpoints: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                self.checkpoints = json.load(f)
+
+    def save(self, checkpoint: Dict):
+        """Store a session's checkpoint, replacing any earlier one for its topic"""
+        checkpoint["updated"] = datetime.now().isoformat()
+        self.checkpoints[normalize_topic(checkpoint["topic"])] = checkpoint
+        self._write()
+
+    def get(self, topic: str) -> Optional[Dict]:
+        return self.checkpoints.get(normalize_topic(topic))
+
+    def latest(self) -> Optional[Dict]:
+        """Most recently updated checkpoint across topics"""
+        return max(self.checkpoints.values(), key=lambda checkpoint: checkpoint["updated"], default=None)
+
+    def discard(self, topic: str, session_id: str = None):
+        """Drop the topic's checkpoint (only if it belongs to `session_id`, when given)"""
+        key = normalize_topic(topic)
+        checkpoint = self.checkpoints.get(key)
+        if checkpoint is None or (session_id and checkpoint["session_id"] != session_id):
+            return
+        del self.checkpoints[key]
+        self._write()
+
+    def topics(self) -> List[str]:
+        return [checkpoint["topic"] for checkpoint in self.checkpoints.values()]
+
+    def _write(self):
+        if not self.checkpoints:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.checkpoints, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
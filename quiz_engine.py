@@ -0,0 +1,361 @@
+"""
+Async quiz session engine for Learning Buddy System
+Each quiz is a small state machine driven by answer events, so one event loop
+can run thousands of concurrent learners; idle sessions expire on their own
+and front ends (the console quiz, an API server) are just clients.
+Unfinished sessions are checkpointed after every answer and can be resumed.
+"""
+
+import asyncio
+import itertools
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+from config_loader import get_setting
+from interactive_quiz import InteractiveQuiz, normalize_answer
+from study_timing import QuizTimer
+from user_profile import get_user_profile
+
+# Session states
+ASKING = "asking"        # a question is waiting for an answer
+FINISHED = "finished"    # every question answered, result recorded
+ABORTED = "aborted"      # stopped by the client and discarded
+PAUSED = "paused"        # stopped by the client, resumable from its checkpoint
+EXPIRED = "expired"      # idle for longer than the engine's idle timeout, resumable
+
+IDLE_TIMEOUT = 900  # seconds
+
+
+class QuizSessionState:
+    """One learner's quiz in progress"""
+
+    __slots__ = ("session_id", "user_profile", "topic", "level", "questions", "answers", "source",
+                 "selector", "current", "number", "correct", "max_questions", "state", "last_active",
+                 "timer", "answering")
+
+    def __init__(self, user_profile, topic: str, questions: List[Dict], source: Iterator[Dict], selector,
+                 max_questions: int):
+        self.session_id = uuid.uuid4().hex
+        self.user_profile = user_profile
+        self.topic = topic
+        self.level = user_profile.get_mastery_level(topic)
+        self.questions = questions  # the fixed question set, or the questions served so far
+        self.answers: List[str] = []
+        self.source = source
+        self.selector = selector
+        self.current = None
+        self.number = 0
+        self.correct = 0
+        self.max_questions = max_questions
+        self.state = ASKING
+        self.last_active = 0.0
+        self.timer = QuizTimer()
+        self.answering = False  # an answer is being graded and saved
+
+    def restore(self, checkpoint: Dict):
+        """Continue from a checkpoint: same id, answers, score and time spent"""
+        self.session_id = checkpoint["session_id"]
+        self.level = checkpoint["level"]
+        self.answers = checkpoint["answers"]
+        self.number = len(self.answers)
+        self.correct = sum(answer == question["correct"] for answer, question in zip(self.answers, self.questions))
+        self.timer = QuizTimer(checkpoint["elapsed"], checkpoint["question_ms"])
+
+    def advance(self) -> bool:
+        """Move to the next question; False when the quiz has run out"""
+        self.current = next(self.source, None)
+        if self.current is None:
+            return False
+        self.number += 1
+        if self.number > len(self.questions):
+            self.questions.append(self.current)
+        self.timer.question_shown()
+        return True
+
+    def checkpoint(self) -> Dict:
+        return {
+            "session_id": self.session_id,
+            "topic": self.topic,
+            "level": self.level,
+            "adaptive": self.selector is not None,
+            "max_questions": self.max_questions,
+            "questions": self.questions,
+            "answers": self.answers,
+            "question_ms": self.timer.question_ms,
+            "elapsed": round(self.timer.elapsed_seconds(), 3)
+        }
+
+    def question_payload(self) -> Dict:
+        question = self.current
+        return {
+            "number": self.number,
+            "max_questions": self.max_questions,
+            "type": question["type"],
+            "question": question["question"],
+            "options": question["options"]
+        }
+
+    def score(self) -> float:
+        return (self.correct / self.number) * 100 if self.number else 0
+
+
+class QuizEngine:
+    """Runs quiz sessions as state machines on the current event loop"""
+
+    def __init__(self, idle_timeout: float = None, sweep_interval: float = None):
+        if idle_timeout is None:
+            idle_timeout = get_setting("system_config", "quiz_idle_timeout", IDLE_TIMEOUT)
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval or max(1.0, idle_timeout / 10)
+        self.sessions = OrderedDict()  # session_id -> session, least recently active first
+        self.reaper = None
+
+    def _touch(self, session: QuizSessionState):
+        session.last_active = asyncio.get_running_loop().time()
+        self.sessions.move_to_end(session.session_id)
+
+    def _ensure_reaper(self):
+        loop = asyncio.get_running_loop()
+        if self.reaper is None or self.reaper.done() or self.reaper.get_loop() is not loop:
+            self.reaper = loop.create_task(self._reap_idle_sessions())
+
+    async def _reap_idle_sessions(self):
+        """Expire sessions idle past the timeout, oldest first"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            cutoff = loop.time() - self.idle_timeout
+            while self.sessions:
+                session = next(iter(self.sessions.values()))
+                if session.last_active > cutoff:
+                    break
+                self.sessions.popitem(last=False)
+                session.state = EXPIRED
+                # Its checkpoint stays, so the learner can resume later
+                await asyncio.to_thread(self._save_partial, session)
+
+    def _get(self, session_id: str) -> QuizSessionState:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(f"Unknown or expired quiz session: {session_id}")
+        return session
+
+    async def start_session(self, user_id: str, topic: str, num_questions: int = 5,
+                            user_profile=None, questions: List[Dict] = None) -> Dict:
+        """Create a session and return its first question
+
+        `questions` runs a given question set (e.g. a generated quiz) instead of drawing one.
+        """
+        self._ensure_reaper()
+        if user_profile is None:
+            # Loading a profile reads storage, so keep it off the event loop
+            user_profile = await asyncio.to_thread(get_user_profile, user_id)
+        quiz = InteractiveQuiz(user_profile)
+
+        selector = None
+        if questions is None:
+            selector = await asyncio.to_thread(self._create_selector, quiz, topic)
+        if selector:
+            questions = []
+            source = quiz.iter_adaptive_questions(topic, num_questions, selector)
+            max_questions = min(num_questions, selector.available())
+        else:
+            if questions is None:
+                questions = await asyncio.to_thread(quiz.generate_quiz_questions, topic, num_questions)
+            questions = list(questions)
+            source = iter(questions)
+            max_questions = len(questions)
+
+        session = QuizSessionState(user_profile, topic, questions, source, selector, max_questions)
+        return await self._open(session)
+
+    async def resume_session(self, user_id: str, topic: str = None, user_profile=None) -> Optional[Dict]:
+        """Reopen the learner's checkpointed quiz on `topic` (default: the latest one)
+
+        Returns None when there is nothing to resume; otherwise the same reply as start_session,
+        plus how many questions were already answered.
+        """
+        self._ensure_reaper()
+        if user_profile is None:
+            user_profile = await asyncio.to_thread(get_user_profile, user_id)
+        checkpoints = await asyncio.to_thread(lambda: user_profile.quiz_checkpoints)
+        checkpoint = checkpoints.get(topic) if topic else checkpoints.latest()
+        if checkpoint is None:
+            return None
+
+        live = self.sessions.get(checkpoint["session_id"])
+        if live is not None:
+            # Still open here (e.g. a second client): hand out its current question
+            self._touch(live)
+            return self._reply(live, resumed=True)
+
+        topic = checkpoint["topic"]
+        quiz = InteractiveQuiz(user_profile)
+        questions = checkpoint["questions"]
+        source = iter(questions[len(checkpoint["answers"]):])
+        selector = None
+        if checkpoint["adaptive"]:
+            selector = await asyncio.to_thread(self._create_selector, quiz, topic)
+            if selector:
+                # Replay the served question first, then keep selecting
+                asked = {question["id"] for question in questions}
+                source = itertools.chain(source, quiz.iter_adaptive_questions(
+                    topic, checkpoint["max_questions"], selector, asked))
+
+        session = QuizSessionState(user_profile, topic, list(questions), source, selector,
+                                   checkpoint["max_questions"])
+        session.restore(checkpoint)
+        return await self._open(session, resumed=True)
+
+    async def _open(self, session: QuizSessionState, resumed: bool = False) -> Dict:
+        if not session.advance():
+            if session.answers:
+                # Checkpointed after its last answer but never finished
+                return await self._finish(session)
+            return {"session_id": None, "state": FINISHED, "question": None}
+        self.sessions[session.session_id] = session
+        self._touch(session)
+        await asyncio.to_thread(self._checkpoint, session)
+        return self._reply(session, resumed)
+
+    @staticmethod
+    def _reply(session: QuizSessionState, resumed: bool = False) -> Dict:
+        reply = {
+            "session_id": session.session_id,
+            "state": session.state,
+            "adaptive": session.selector is not None,
+            "question": session.question_payload()
+        }
+        if resumed:
+            reply.update(resumed=True, answered=session.number - 1, correct_count=session.correct)
+        return reply
+
+    async def answer(self, session_id: str, raw_answer: str) -> Dict:
+        """Grade an answer to the current question and move the session on"""
+        session = self._get(session_id)
+        self._touch(session)
+        if session.answering:
+            # A double submit would grade the same question twice and skip the next one
+            return {"valid": False, "busy": True, "state": session.state,
+                    "question": session.question_payload()}
+        question = session.current
+        answer = normalize_answer(question, raw_answer)
+        if answer is None:
+            return {"valid": False, "state": session.state, "question": session.question_payload()}
+
+        session.answering = True
+        try:
+            return await self._grade(session, question, answer)
+        finally:
+            session.answering = False
+
+    async def _grade(self, session: QuizSessionState, question: Dict, answer: str) -> Dict:
+        response_ms = session.timer.question_answered()
+        correct = answer == question["correct"]
+        session.answers.append(answer)
+        session.correct += correct
+        if "id" in question or session.selector:
+            await asyncio.to_thread(self._record_answer, session, question, correct)
+
+        feedback = {
+            "valid": True,
+            "correct": correct,
+            "correct_answer": question["correct"],
+            "explanation": question["explanation"],
+            "correct_count": session.correct,
+            "answered": session.number,
+            "response_seconds": round(response_ms / 1000, 1)
+        }
+        if session.advance():
+            feedback.update(state=session.state, question=session.question_payload())
+            await asyncio.to_thread(self._checkpoint, session)
+        else:
+            feedback.update(await self._finish(session))
+        return feedback
+
+    async def _finish(self, session: QuizSessionState) -> Dict:
+        """Record the result and close the session"""
+        self.sessions.pop(session.session_id, None)
+        session.state = FINISHED
+        score = session.score()
+        time_spent = session.timer.elapsed_minutes()
+        await asyncio.to_thread(self._persist, session, score, time_spent)
+        return {"state": session.state, "question": None, "score": score, "total": session.number,
+                "correct_count": session.correct, "time_spent_minutes": time_spent}
+
+    def _record_answer(self, session: QuizSessionState, question: Dict, correct: bool):
+        """Runs in a worker thread; the profile lock keeps this user's other sessions out"""
+        with session.user_profile.lock:
+            if "id" in question:
+                session.user_profile.reviews.record_review(question["id"], session.topic, correct)
+            if session.selector:
+                session.selector.record(question, correct)
+
+    def _create_selector(self, quiz: InteractiveQuiz, topic: str):
+        # Reads the ability file this user's other sessions write; item parameters lock themselves
+        with quiz.user_profile.lock:
+            return quiz.create_selector(topic)
+
+    def _persist(self, session: QuizSessionState, score: float, time_spent: float):
+        with session.user_profile.lock:
+            session.user_profile.record_activity(session.topic, score, time_spent,
+                                                 session.timer.question_ms, session.level)
+            session.user_profile.reviews.save()
+            if session.selector:
+                session.selector.save()
+            session.user_profile.quiz_checkpoints.discard(session.topic, session.session_id)
+
+    def _checkpoint(self, session: QuizSessionState):
+        with session.user_profile.lock:
+            session.user_profile.quiz_checkpoints.save(session.checkpoint())
+
+    def _save_partial(self, session: QuizSessionState):
+        """Answers already given still count for review scheduling and ability estimates"""
+        with session.user_profile.lock:
+            session.user_profile.reviews.save()
+            if session.selector:
+                session.selector.save()
+
+    def question_shown(self, session_id: str):
+        """Restart the current question's clock when the client actually displays it"""
+        session = self._get(session_id)
+        self._touch(session)
+        session.timer.question_shown()
+
+    async def pause(self, session_id: str) -> Dict:
+        """Close a session but keep its checkpoint so resume_session can continue it"""
+        session = self._get(session_id)
+        self.sessions.pop(session_id, None)
+        session.state = PAUSED
+        await asyncio.to_thread(self._save_partial, session)
+        return {"state": session.state, "answered": session.number - 1, "correct_count": session.correct}
+
+    async def abort(self, session_id: str) -> Dict:
+        """Stop a session for good without recording a quiz result"""
+        session = self._get(session_id)
+        self.sessions.pop(session_id, None)
+        session.state = ABORTED
+        await asyncio.to_thread(self._discard, session)
+        return {"state": session.state, "answered": session.number - 1, "correct_count": session.correct}
+
+    def _discard(self, session: QuizSessionState):
+        self._save_partial(session)
+        with session.user_profile.lock:
+            session.user_profile.quiz_checkpoints.discard(session.topic, session.session_id)
+
+    def state(self, session_id: str) -> Optional[str]:
+        session = self.sessions.get(session_id)
+        return session.state if session else None
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+
+_engine = None
+
+def get_quiz_engine() -> QuizEngine:
+    """Process-wide quiz engine shared by every front end"""
+    global _engine
+    if _engine is None:
+        _engine = QuizEngine()
+    return _engine
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Quiz ingestion for Learning Buddy System
+Normalizes LLM-generated quizzes (quizzes/*.json and *.txt) into the question
+bank format, deduplicates them by content hash and adds them to the bank
+"""
+
+import argparse
+import json
+import os
+import re
+from typing import Dict, List, Optional
+from config_loader import get_setting
+from question_bank import GENERATED_QUESTIONS_FILE, QuestionBank, content_hash, get_question_bank
+
+QUIZ_DIR = "quizzes"
+LEVELS = ("struggling", "beginner", "intermediate", "advanced")
+LETTERS = "ABCD"
+
+QUESTION_TYPES = {
+    "multiple-choice": "multiple-choice",
+    "multiple choice": "multiple-choice",
+    "multiple_choice": "multiple-choice",
+    "mcq": "multiple-choice",
+    "true-false": "true-false",
+    "true/false": "true-false",
+    "true_false": "true-false",
+    "true or false": "true-false",
+    "boolean": "true-false"
+}
+ANSWER_KEYS = ("correct", "correct-answer", "correctAnswer", "correct_answer", "answer")
+
+# "B) text", "B. text", "(B) text", "B: text", "B text"
+LETTER_PREFIX = re.compile(r"^\(?([A-D])(?:[).:]\s*|\s+)(.*)$", re.DOTALL)
+QUIZ_FILE_NAME = re.compile(r"^(?P<topic>.+)_\d{8}_\d{6}$")
+
+def extract_quiz_json(text: str) -> Optional[Dict]:
+    """Pull the quiz object out of raw LLM output (bare JSON, fenced block or surrounding prose)"""
+    candidates = [text]
+    candidates += re.findall(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        candidates.append(text[start:end + 1])
+
+    for candidate in candidates:
+        try:
+            data = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(data, list):
+            data = {"questions": data}
+        if isinstance(data, dict) and isinstance(data.get("questions"), list):
+            return data
+    return None
+
+def _option_texts(options: List) -> List[str]:
+    """Option labels without letter prefixes; accepts strings or {text, value} dicts"""
+    texts = [str(option.get("text", "")) if isinstance(option, dict) else str(option) for option in options]
+    # Strip "A) " style prefixes only when every option carries its own letter
+    matches = [LETTER_PREFIX.match(text.strip()) for text in texts]
+    if all(match and match.group(1) == LETTERS[i] for i, match in enumerate(matches)):
+        texts = [match.group(2) for match in matches]
+    return [text.strip() for text in texts]
+
+def _answer_index(answer: str, options: List, texts: List[str]) -> Optional[int]:
+    """Position of the correct option, matched by option value, letter or text"""
+    answer = answer.strip()
+    for i, option in enumerate(options):
+        if isinstance(option, dict) and str(option.get("value", "")).strip().casefold() == answer.casefold():
+            return i
+    folded = [text.casefold() for text in texts]
+    if answer.casefold() in folded:
+        return folded.index(answer.casefold())
+    match = LETTER_PREFIX.match(answer) or re.fullmatch(r"\(?([A-D])\)?", answer)
+    if match and LETTERS.index(match.group(1)) < len(options):
+        return LETTERS.index(match.group(1))
+    return None
+
+def normalize_question(raw: Dict, topic: str, level: str) -> Optional[Dict]:
+    """Convert one generated question to the bank format, or None if it cannot be graded"""
+    if not isinstance(raw, dict) or not raw.get("question"):
+        return None
+    question_type = QUESTION_TYPES.get(str(raw.get("type", "")).strip().lower())
+    answer = next((raw[key] for key in ANSWER_KEYS if raw.get(key) not in (None, "")), None)
+    options = raw.get("options") or []
+    if question_type is None or answer is None or not isinstance(options, list):
+        # Short-answer and other free-text questions are not auto-gradable
+        return None
+
+    texts = _option_texts(options)
+    if question_type == "true-false":
+        index = _answer_index(str(answer), options, texts) if options else None
+        verdict = texts[index] if index is not None else str(answer)
+        verdict = verdict.strip().casefold()
+        if verdict not in ("true", "t", "false", "f"):
+            return None
+        normalized_options = ["True", "False"]
+        correct = "True" if verdict in ("true", "t") else "False"
+    else:
+        if not 2 <= len(texts) <= len(LETTERS):
+            return None
+        index = _answer_index(str(answer), options, texts)
+        if index is None:
+            return None
+        normalized_options = [f"{LETTERS[i]}) {text}" for i, text in enumerate(texts)]
+        correct = LETTERS[index]
+
+    raw_level = str(raw.get("level") or raw.get("difficulty") or "").strip().lower()
+    question = {
+        "topic": topic,
+        "level": raw_level if raw_level in LEVELS else level,
+        "tags": ["generated"],
+        "type": question_type,
+        "question": " ".join(str(raw["question"]).split()),
+        "options": normalized_options,
+        "correct": correct,
+        "explanation": str(raw.get("explanation", "")).strip()
+    }
+    hints = raw.get("hints")
+    if isinstance(hints, list) and hints:
+        question["hints"] = [str(hint) for hint in hints]
+    question["id"] = content_hash(question)
+    return question
+
+def normalize_quiz(quiz: Dict, topic: str, level: str) -> List[Dict]:
+    questions = (normalize_question(raw, topic, level) for raw in quiz.get("questions", []))
+    return [question for question in questions if question is not None]
+
+def _near_duplicate_index(bank: QuestionBank):
+    if not get_setting("near_duplicates", "enabled", True):
+        return None
+    # NumPy is only imported once questions are actually ingested
+    try:
+        from near_duplicates import NearDuplicateIndex, get_near_duplicate_index
+    except ImportError:  # NumPy not installed: only exact duplicates are rejected
+        return None
+    return get_near_duplicate_index() if bank is get_question_bank() else NearDuplicateIndex(bank)
+
+def add_to_bank(questions: List[Dict], bank: QuestionBank = None,
+                path: str = GENERATED_QUESTIONS_FILE, stats: Dict = None) -> int:
+    """Index new questions and append them to the generated questions file
+
+    Exact and near-duplicates of bank questions are skipped; `stats`, if given,
+    counts the near-duplicates under "near_duplicates".
+    """
+    bank = bank or get_question_bank()
+    index = _near_duplicate_index(bank)
+    added = []
+    for question in questions:
+        if index is not None and question["id"] not in bank.by_id and index.find(question):
+            if stats is not None:
+                stats["near_duplicates"] = stats.get("near_duplicates", 0) + 1
+            continue
+        if bank.add(question):
+            added.append(question)
+            if index is not None:
+                index.sync()
+    if added:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'a', encoding="utf-8") as f:
+            f.write("".join(json.dumps(question, ensure_ascii=False) + "\n" for question in added))
+    return len(added)
+
+def ingest_quiz_text(text: str, topic: str, level: str = "beginner", bank: QuestionBank = None) -> int:
+    """Add the gradable questions from one raw LLM quiz response; returns how many were new"""
+    quiz = extract_quiz_json(text)
+    if quiz is None:
+        return 0
+    return add_to_bank(normalize_quiz(quiz, topic, level), bank)
+
+def ingest_directory(quiz_dir: str = QUIZ_DIR, level: str = "beginner", bank: QuestionBank = None) -> Dict:
+    """Ingest every saved quiz file; the topic comes from the {topic}_{timestamp} file name"""
+    stats = {"files": 0, "unparsed": 0, "added": 0, "near_duplicates": 0}
+    if not os.path.isdir(quiz_dir):
+        return stats
+
+    for name in sorted(os.listdir(quiz_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext not in (".json", ".txt"):
+            continue
+        match = QUIZ_FILE_NAME.match(stem)
+        topic = match.group("topic") if match else stem
+        with open(os.path.join(quiz_dir, name), 'r', encoding="utf-8") as f:
+            quiz = extract_quiz_json(f.read())
+
+        stats["files"] += 1
+        if quiz is None:
+            stats["unparsed"] += 1
+            continue
+        stats["added"] += add_to_bank(normalize_quiz(quiz, topic, level), bank, stats=stats)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Add saved LLM quizzes to the question bank")
+    parser.add_argument("--dir", default=QUIZ_DIR, help="Directory holding generated quiz files")
+    parser.add_argument("--level", default="beginner", choices=LEVELS,
+                        help="Level for questions that do not state one")
+    args = parser.parse_args()
+
+    stats = ingest_directory(args.dir, args.level)
+    print(f"✅ Scanned {stats['files']} quiz file(s), added {stats['added']} new question(s)")
+    if stats["near_duplicates"]:
+        print(f"🔁 Skipped {stats['near_duplicates']} near-duplicate(s) of questions already in the bank")
+    if stats["unparsed"]:
+        print(f"⚠️  {stats['unparsed']} file(s) had no parseable quiz JSON")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Quiz prefetching for Learning Buddy System
+Keeps a pool of LLM-generated, validated quizzes per (topic, mastery level)
+topped up by a background worker, so quiz requests are answered from the pool
+instead of waiting on a full crew run
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+from config_loader import get_setting
+from question_bank import normalize_topic
+from quiz_ingest import add_to_bank, extract_quiz_json, normalize_quiz
+
+TARGET_DEPTH = 2
+QUIZ_SIZE = 5
+MISS_WAIT_SECONDS = 2  # how long a miss waits on a refill that is about to land
+LATENCY_WINDOW = 100  # refill latencies kept for the metrics
+
+# (topic, mastery_level, num_questions) -> raw LLM quiz text
+QuizGenerator = Callable[[str, str, int], str]
+
+
+class QuizPrefetchPool:
+    """Per-(topic, mastery level) queues of ready quizzes, refilled in the background"""
+
+    def __init__(self, generator: QuizGenerator, target_depth: int = None, quiz_size: int = None,
+                 miss_wait: float = None):
+        self.generator = generator
+        self.target_depth = target_depth or get_setting("quiz_prefetch", "target_depth", TARGET_DEPTH)
+        self.quiz_size = quiz_size or get_setting("quiz_prefetch", "quiz_size", QUIZ_SIZE)
+        self.miss_wait = miss_wait if miss_wait is not None else get_setting("quiz_prefetch", "miss_wait_seconds",
+                                                                             MISS_WAIT_SECONDS)
+        self.pools: Dict[Tuple[str, str], deque] = {}
+        self.topics: Dict[Tuple[str, str], str] = {}  # key -> topic as first requested
+        self.pending: Dict[Tuple[str, str], int] = {}  # key -> refills queued or running
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)  # notified whenever a refill finishes
+        self.requests = queue.Queue()
+        self.worker = None
+
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.failed_refills = 0
+        self.refill_latencies = deque(maxlen=LATENCY_WINDOW)
+
+    @staticmethod
+    def _key(topic: str, mastery_level: str) -> Tuple[str, str]:
+        return normalize_topic(topic), mastery_level
+
+    def take(self, topic: str, mastery_level: str, num_questions: int = None) -> Optional[Dict]:
+        """A ready quiz ({"questions": [...]}) for the topic and level, or None on a miss
+
+        An empty pool with a refill under way waits briefly (`miss_wait`) in case it is
+        about to land; past that the caller is better off generating in the foreground.
+        A hit tops the pool back up to its target depth; a miss, which the caller answers
+        with its own generation, queues one.
+        """
+        num_questions = num_questions or self.quiz_size
+        # Pooled quizzes hold quiz_size questions; larger requests go to the LLM directly
+        # and don't queue refills the pool could never serve them from
+        if num_questions > self.quiz_size:
+            with self.lock:
+                self.misses += 1
+            return None
+        key = self._key(topic, mastery_level)
+        quiz = None
+        with self.lock:
+            self.topics.setdefault(key, topic)
+            pool = self.pools.setdefault(key, deque())
+            if not pool and self.pending.get(key):
+                self.ready.wait_for(lambda: pool or not self.pending.get(key), timeout=self.miss_wait)
+            if pool:
+                quiz = {"questions": pool.popleft()[:num_questions]}
+                self.hits += 1
+            else:
+                self.misses += 1
+        self.refill(topic, mastery_level, self.target_depth if quiz else 1)
+        return quiz
+
+    def refill(self, topic: str, mastery_level: str, depth: int = None):
+        """Queue enough generations to bring the pool up to `depth` (default: its target depth)"""
+        depth = depth or self.target_depth
+        key = self._key(topic, mastery_level)
+        with self.lock:
+            self.topics.setdefault(key, topic)
+            missing = depth - len(self.pools.setdefault(key, deque())) - self.pending.get(key, 0)
+            if missing <= 0:
+                return
+            self.pending[key] = self.pending.get(key, 0) + missing
+            self._ensure_worker()
+        for _ in range(missing):
+            self.requests.put(key)
+
+    def _ensure_worker(self):
+        if self.worker is None or not self.worker.is_alive():
+            self.worker = threading.Thread(target=self._run, name="quiz-prefetch", daemon=True)
+            self.worker.start()
+
+    def _run(self):
+        while True:
+            key = self.requests.get()
+            try:
+                self._generate(key)
+            finally:
+                with self.lock:
+                    self.pending[key] -= 1
+                    self.ready.notify_all()
+                self.requests.task_done()
+
+    def _generate(self, key: Tuple[str, str]):
+        topic, mastery_level = self.topics[key], key[1]
+        started = time.monotonic()
+        try:
+            text = self.generator(topic, mastery_level, self.quiz_size)
+        except Exception as e:
+            with self.lock:
+                self.failed_refills += 1
+            print(f"⚠️  Quiz prefetch for {topic} ({mastery_level}) failed: {e}")
+            return
+
+        questions = self.validate(text, topic, mastery_level)
+        if not questions:
+            with self.lock:
+                self.failed_refills += 1
+            return
+        # Generated questions also become question bank inventory
+        add_to_bank(questions)
+        with self.lock:
+            self.pools[key].append(questions)
+            self.refills += 1
+            self.refill_latencies.append(time.monotonic() - started)
+
+    def validate(self, text: str, topic: str, mastery_level: str) -> Optional[List[Dict]]:
+        """Gradable questions from a raw LLM quiz, or None unless it has a full quiz's worth"""
+        quiz = extract_quiz_json(text)
+        if quiz is None:
+            return None
+        questions = normalize_quiz(quiz, topic, mastery_level)
+        return questions if len(questions) >= self.quiz_size else None
+
+    def wait_idle(self):
+        """Block until every queued refill has finished (used by scripts and tests)"""
+        self.requests.join()
+
+    def metrics(self) -> Dict:
+        with self.lock:
+            latencies = sorted(self.refill_latencies)
+            requests = self.hits + self.misses
+            return {
+                "depth": {f"{self.topics[key]} ({key[1]})": len(pool) for key, pool in self.pools.items()},
+                "pending_refills": sum(self.pending.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "refills": self.refills,
+                "failed_refills": self.failed_refills,
+                "refill_latency_avg": sum(latencies) / len(latencies) if latencies else 0.0,
+                "refill_latency_p50": latencies[len(latencies) // 2] if latencies else 0.0,
+                "refill_latency_max": latencies[-1] if latencies else 0.0
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_quiz_prefetch_pool(generator: QuizGenerator = None) -> Optional[QuizPrefetchPool]:
+    """Process-wide prefetch pool; created by the first caller that supplies a generator"""
+    global _pool
+    with _pool_lock:
+        if _pool is None and generator is not None and get_setting("quiz_prefetch", "enabled", True):
+            _pool = QuizPrefetchPool(generator)
+        return _pool
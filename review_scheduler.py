@@ -0,0 +1,187 @@
+"""
+Spaced repetition for Learning Buddy System
+Each answered question is scheduled for review using the
+study_techniques.spaced_repetition.intervals from config.json; due dates are
+kept in per-topic min-heaps so due items are found without scanning them all
+"""
+
+import heapq
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from config_loader import get_setting
+from question_bank import normalize_topic
+from score_series import from_epoch_micros, to_epoch_micros
+
+REVIEW_DIR = "learning_data"
+DAY_MICROS = 24 * 60 * 60 * 1_000_000
+DEFAULT_INTERVALS = [1, 3, 7, 14, 30]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+def _now_micros() -> int:
+    return to_epoch_micros(datetime.now().isoformat())
+
+
+class ReviewItem:
+    """Review state of one question for one user"""
+
+    __slots__ = ("question_id", "topic", "stage", "due", "reviews", "lapses")
+
+    def __init__(self, question_id: str, topic: str, stage: int = -1, due: int = 0,
+                 reviews: int = 0, lapses: int = 0):
+        self.question_id = question_id
+        self.topic = topic
+        self.stage = stage    # index into the interval list, -1 before the first review
+        self.due = due        # epoch microseconds
+        self.reviews = reviews
+        self.lapses = lapses
+
+    def to_list(self) -> List:
+        return [self.topic, self.stage, self.due, self.reviews, self.lapses]
+
+
+class ReviewScheduler:
+    """Per-user review queue; correct answers move a question to the next interval, misses reset it"""
+
+    def __init__(self, user_id: str, intervals: List[int] = None, review_dir: str = REVIEW_DIR):
+        if intervals is None:
+            intervals = get_setting("study_techniques", "spaced_repetition", {}).get("intervals", DEFAULT_INTERVALS)
+        self.user_id = user_id
+        self.intervals = intervals
+        self.review_file = os.path.join(review_dir, f"{user_id}_reviews.json")
+        self.items: Dict[str, ReviewItem] = {}
+        # normalized topic -> heap of (due, question_id); rescheduled items leave stale entries behind
+        self.heaps: Dict[str, List[Tuple[int, str]]] = {}
+        self.stale = 0
+        self.dirty = False
+
+    @classmethod
+    def load(cls, user_id: str, intervals: List[int] = None, review_dir: str = REVIEW_DIR) -> "ReviewScheduler":
+        scheduler = cls(user_id, intervals, review_dir)
+        if os.path.exists(scheduler.review_file):
+            with open(scheduler.review_file, 'r') as f:
+                data = json.load(f)
+            for question_id, fields in data["items"].items():
+                scheduler.items[question_id] = ReviewItem(question_id, *fields)
+            for item in scheduler.items.values():
+                scheduler.heaps.setdefault(normalize_topic(item.topic), []).append((item.due, item.question_id))
+            for heap in scheduler.heaps.values():
+                heapq.heapify(heap)
+        return scheduler
+
+    def save(self):
+        """Write the review state if it changed since the last save"""
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.review_file) or ".", exist_ok=True)
+        tmp_path = self.review_file + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"items": {question_id: item.to_list() for question_id, item in self.items.items()}},
+                      f, separators=(',', ':'))
+        os.replace(tmp_path, self.review_file)
+        self.dirty = False
+
+    def record_review(self, question_id: str, topic: str, correct: bool, now: int = None) -> ReviewItem:
+        """Reschedule a question after it was answered; O(log n)"""
+        now = _now_micros() if now is None else now
+        item = self.items.get(question_id)
+        if item is None:
+            item = self.items[question_id] = ReviewItem(question_id, topic)
+        else:
+            self.stale += 1
+
+        if correct:
+            item.stage = min(item.stage + 1, len(self.intervals) - 1)
+        else:
+            item.stage = 0
+            item.lapses += 1
+        item.reviews += 1
+        item.due = now + self.intervals[item.stage] * DAY_MICROS
+
+        heapq.heappush(self.heaps.setdefault(normalize_topic(topic), []), (item.due, question_id))
+        self.dirty = True
+        if self.stale > len(self.items):
+            self._rebuild_heaps()
+        return item
+
+    def _rebuild_heaps(self):
+        """Drop stale heap entries once they outnumber live items"""
+        self.heaps = {}
+        for item in self.items.values():
+            self.heaps.setdefault(normalize_topic(item.topic), []).append((item.due, item.question_id))
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+        self.stale = 0
+
+    def _iter_heap(self, heap: List[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+        """Live entries of a heap in due order, without modifying it: O(log k) per entry"""
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier:
+            (due, question_id), index = heapq.heappop(frontier)
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+            item = self.items.get(question_id)
+            if item is not None and item.due == due:
+                yield due, question_id
+
+    def iter_due(self, topic: str = None, until: int = None) -> Iterator[ReviewItem]:
+        """Items due by `until` (default: now), earliest first, optionally for one topic"""
+        until = _now_micros() if until is None else until
+        if topic is not None:
+            heap = self.heaps.get(normalize_topic(topic), [])
+            entries = self._iter_heap(heap)
+        else:
+            entries = heapq.merge(*(self._iter_heap(heap) for heap in self.heaps.values()))
+        for due, question_id in entries:
+            if due > until:
+                return
+            yield self.items[question_id]
+
+    def due_question_ids(self, topic: str = None, limit: int = None, until: int = None) -> List[str]:
+        """Question ids due for review, earliest first"""
+        due = []
+        for item in self.iter_due(topic, until):
+            due.append(item.question_id)
+            if len(due) == limit:
+                break
+        return due
+
+    def next_due(self, topic: str = None) -> Optional[ReviewItem]:
+        return next(self.iter_due(topic, until=float("inf")), None)
+
+    def due_by_day(self, days: int = 7, now: int = None) -> List[Dict[str, int]]:
+        """Per-calendar-day {topic: count} of reviews due over `days` days starting today
+
+        Day 0 also includes everything already overdue.
+        """
+        now = _now_micros() if now is None else now
+        midnight = now - now % DAY_MICROS
+        schedule = [{} for _ in range(days)]
+        for item in self.iter_due(until=midnight + days * DAY_MICROS - 1):
+            day = max(0, (item.due - midnight) // DAY_MICROS)
+            schedule[day][item.topic] = schedule[day].get(item.topic, 0) + 1
+        return schedule
+
+    def due_topics(self, now: int = None) -> List[str]:
+        """Topics with reviews due today, most due first"""
+        today = self.due_by_day(1, now)[0]
+        return sorted(today, key=today.get, reverse=True)
+
+    def due_first(self, topics: List[str], now: int = None) -> List[str]:
+        """Topics with reviews due today first, then the given topics in order"""
+        ordered = {}
+        for topic in self.due_topics(now) + list(topics):
+            ordered.setdefault(normalize_topic(topic), topic)
+        return list(ordered.values())
+
+    def reviews_by_weekday(self, now: int = None) -> Dict[str, Dict[str, int]]:
+        """Reviews due over the coming week keyed by weekday name, starting today"""
+        now = _now_micros() if now is None else now
+        today = datetime.fromisoformat(from_epoch_micros(now)).weekday()
+        return {WEEKDAYS[(today + offset) % 7]: topics
+                for offset, topics in enumerate(self.due_by_day(7, now))}
+
+    def __len__(self) -> int:
+        return len(self.items)
@@ -0,0 +1,145 @@
+"""
+Typed profile and progress documents for Learning Buddy System
+Stored JSON is validated and defaults are filled once at decode time, so the
+rest of the code reads plain attributes instead of dict lookups with fallbacks
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+from score_series import ScoreSeries
+
+NUMBER = (int, float)
+OPTIONAL_STR = (str, type(None))
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+class Document:
+    """Fixed set of slotted fields decoded from and encoded to a JSON object
+
+    Known fields encode in schema order, which is the order the app has always
+    written them in. Unknown keys are kept in `extras` together with the original
+    key order, so decode(data).encode() == data for stored files.
+    """
+
+    # field name -> (accepted types, default value or factory)
+    SCHEMA: Dict[str, tuple] = {}
+    FIELDS: tuple = ()
+
+    __slots__ = ("extras", "key_order")
+
+    def __init__(self, **values):
+        self.extras = None
+        self.key_order = None
+        for name, (types, default) in self.SCHEMA.items():
+            if name in values:
+                setattr(self, name, self._validate(name, values[name]))
+            else:
+                setattr(self, name, default() if callable(default) else default)
+
+    @classmethod
+    def decode(cls, data: Optional[Dict] = None, **defaults) -> "Document":
+        """Validate a stored JSON object, filling missing fields from `defaults` or the schema"""
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            raise ValueError(f"{cls.__name__} must be a JSON object, got {type(data).__name__}")
+
+        document = cls.__new__(cls)
+        document.extras = None
+        for name, (types, default) in cls.SCHEMA.items():
+            if name in data:
+                value = document._validate(name, data[name])
+            elif name in defaults:
+                value = defaults[name]
+            else:
+                value = default() if callable(default) else default
+            setattr(document, name, value)
+
+        document.key_order = None
+        if any(key not in cls.SCHEMA for key in data):
+            document.extras = {key: value for key, value in data.items() if key not in cls.SCHEMA}
+            document.key_order = tuple(data) + tuple(name for name in cls.FIELDS if name not in data)
+        return document
+
+    def encode(self) -> Dict:
+        """JSON object in the stored key order"""
+        extras = self.extras or {}
+        return {name: extras[name] if name in extras else getattr(self, name)
+                for name in self.key_order or self.FIELDS}
+
+    def _validate(self, name: str, value: Any) -> Any:
+        types = self.SCHEMA[name][0]
+        if not isinstance(value, types) or isinstance(value, bool) and bool not in types:
+            raise ValueError(f"{type(self).__name__}.{name} has invalid type {type(value).__name__}")
+        return value
+
+    def update(self, values: Dict):
+        """Set fields from a dict, keeping unknown keys as extras"""
+        for name, value in values.items():
+            if name in self.SCHEMA:
+                setattr(self, name, self._validate(name, value))
+                continue
+            if self.extras is None:
+                self.extras = {}
+            if name not in self.extras:
+                self.key_order = (self.key_order or self.FIELDS) + (name,)
+            self.extras[name] = value
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Document):
+            return type(self) is type(other) and self.encode() == other.encode()
+        if isinstance(other, dict):
+            return self.encode() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.encode()!r})"
+
+
+class Profile(Document):
+    """User preferences"""
+
+    SCHEMA = {
+        "user_id": (str, "default_user"),
+        "learning_style": (str, "visual"),  # visual, auditory, kinesthetic, reading
+        "difficulty_preference": (str, "intermediate"),
+        "interests": (list, list),
+        "goals": (list, list),
+        "time_availability": (NUMBER, 30),  # minutes per day
+        "preferred_explanation_style": (str, "simple"),  # simple, detailed, analogies, examples
+        "strengths": (list, list),
+        "weaknesses": (list, list),
+        "created_at": (str, _now)
+    }
+    FIELDS = tuple(SCHEMA)
+
+    __slots__ = FIELDS
+
+
+class Progress(Document):
+    """Learning progress snapshot; quiz_scores maps topic -> ScoreSeries"""
+
+    SCHEMA = {
+        "topics_completed": (list, list),
+        "quiz_scores": (dict, dict),
+        "learning_streaks": (int, 0),
+        "total_study_time": (NUMBER, 0),
+        "last_activity": (OPTIONAL_STR, None),
+        "current_topics": (list, list),
+        "mastery_levels": (dict, dict),
+        "activity_seq": (int, 0),
+        "response_times": (dict, dict),  # topic -> mastery level -> recent question times (ms)
+        "session_times": (list, list)    # recent session lengths (seconds)
+    }
+    FIELDS = tuple(SCHEMA)
+
+    __slots__ = FIELDS
+
+    def _validate(self, name: str, value: Any) -> Any:
+        value = super()._validate(name, value)
+        if name == "quiz_scores":
+            # Both the compact and the legacy list-of-records forms are accepted
+            return {topic: ScoreSeries.decode(scores) for topic, scores in value.items()}
+        return value
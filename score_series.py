@@ -0,0 +1,232 @@
+"""
+Compact quiz score history for Learning Buddy System
+Scores and timestamps live in contiguous arrays instead of per-score dicts;
+history older than the retention window is folded into running aggregates
+"""
+
+import base64
+import sys
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Union
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+def to_epoch_micros(date: str) -> int:
+    """Convert an ISO timestamp to microseconds since the (naive) epoch"""
+    return (datetime.fromisoformat(date) - EPOCH) // ONE_MICROSECOND
+
+def from_epoch_micros(micros: int) -> str:
+    """Convert microseconds since the (naive) epoch back to an ISO timestamp"""
+    return (EPOCH + timedelta(microseconds=micros)).isoformat()
+
+def _float32_value(value: float) -> float:
+    """Shortest decimal that round-trips to the same float32 score"""
+    for digits in range(1, 10):
+        candidate = round(value, digits)
+        if array('f', [candidate])[0] == value:
+            return candidate
+    return value
+
+def _pack(values: array) -> str:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+def _unpack(typecode: str, data: str) -> array:
+    values = array(typecode)
+    values.frombytes(base64.b64decode(data))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class ScoreRollup:
+    """Aggregates of scores that have aged out of the raw history"""
+
+    __slots__ = ("count", "sum", "sum_squares", "min", "max", "first_score", "first_date", "last_date")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.min = None
+        self.max = None
+        self.first_score = None
+        self.first_date = None
+        self.last_date = None
+
+    def add(self, score: float, micros: int):
+        if self.count == 0:
+            self.min = self.max = self.first_score = score
+            self.first_date = micros
+        self.count += 1
+        self.sum += score
+        self.sum_squares += score * score
+        self.min = min(self.min, score)
+        self.max = max(self.max, score)
+        self.last_date = micros
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "sum_squares": self.sum_squares,
+            "min": self.min,
+            "max": self.max,
+            "first_score": self.first_score,
+            "first_date": from_epoch_micros(self.first_date),
+            "last_date": from_epoch_micros(self.last_date)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ScoreRollup":
+        rollup = cls()
+        rollup.count = data["count"]
+        rollup.sum = data["sum"]
+        rollup.sum_squares = data["sum_squares"]
+        rollup.min = data["min"]
+        rollup.max = data["max"]
+        rollup.first_score = data["first_score"]
+        rollup.first_date = to_epoch_micros(data["first_date"])
+        rollup.last_date = to_epoch_micros(data["last_date"])
+        return rollup
+
+
+class ScoreSeries:
+    """Score history for one topic, readable like a list of {"score", "date"} dicts
+
+    Indexing and iteration cover the raw (recent) history only; count, total,
+    mean() and first() also include any rolled-up older scores.
+    """
+
+    __slots__ = ("scores", "timestamps", "total", "rollup")
+
+    def __init__(self, scores: array = None, timestamps: array = None, rollup: ScoreRollup = None):
+        self.scores = scores if scores is not None else array('f')
+        self.timestamps = timestamps if timestamps is not None else array('q')
+        self.rollup = rollup
+        self.total = float(sum(self.scores)) + (rollup.sum if rollup else 0.0)
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "ScoreSeries":
+        """Build a series from the legacy list-of-dicts representation"""
+        return cls(
+            array('f', [r["score"] for r in records]),
+            array('q', [to_epoch_micros(r["date"]) for r in records])
+        )
+
+    @classmethod
+    def decode(cls, data: Union[List[Dict], Dict, "ScoreSeries"]) -> "ScoreSeries":
+        """Decode either the compact on-disk form or the legacy list form"""
+        if isinstance(data, ScoreSeries):
+            return data
+        if isinstance(data, dict):
+            rollup = ScoreRollup.from_dict(data["rollup"]) if "rollup" in data else None
+            return cls(_unpack('f', data["scores"]), _unpack('q', data["dates"]), rollup)
+        return cls.from_records(data)
+
+    def encode(self) -> Dict:
+        """Compact on-disk form: base64 little-endian float32 scores and int64 timestamps"""
+        encoded = {"scores": _pack(self.scores), "dates": _pack(self.timestamps)}
+        if self.rollup:
+            encoded["rollup"] = self.rollup.to_dict()
+        return encoded
+
+    def compact(self, cutoff: str, keep: int = 3) -> int:
+        """Fold scores dated before `cutoff` into the rollup, keeping at least `keep` raw scores"""
+        cutoff_micros = to_epoch_micros(cutoff)
+        limit = len(self.scores) - keep
+        folded = 0
+        while folded < limit and self.timestamps[folded] < cutoff_micros:
+            folded += 1
+        if folded == 0:
+            return 0
+
+        if self.rollup is None:
+            self.rollup = ScoreRollup()
+        for i in range(folded):
+            self.rollup.add(self.scores[i], self.timestamps[i])
+        del self.scores[:folded]
+        del self.timestamps[:folded]
+        return folded
+
+    def to_records(self) -> List[Dict]:
+        return [self._record(i) for i in range(len(self.scores))]
+
+    def append(self, score: float, date: str):
+        self.scores.append(score)
+        self.timestamps.append(to_epoch_micros(date))
+        self.total += self.scores[-1]
+
+    def _record(self, index: int) -> Dict:
+        return {
+            "score": _float32_value(self.scores[index]),
+            "date": from_epoch_micros(self.timestamps[index])
+        }
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._record(i) for i in range(*index.indices(len(self.scores)))]
+        if index < 0:
+            index += len(self.scores)
+        if not 0 <= index < len(self.scores):
+            raise IndexError("score index out of range")
+        return self._record(index)
+
+    def __iter__(self):
+        for i in range(len(self.scores)):
+            yield self._record(i)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ScoreSeries):
+            return (self.scores == other.scores and self.timestamps == other.timestamps
+                    and (self.rollup.to_dict() if self.rollup else None)
+                    == (other.rollup.to_dict() if other.rollup else None))
+        if isinstance(other, list):
+            return self.to_records() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ScoreSeries({self.to_records()!r})"
+
+    @property
+    def count(self) -> int:
+        """Number of scores, including rolled-up history"""
+        return len(self.scores) + (self.rollup.count if self.rollup else 0)
+
+    def mean(self) -> float:
+        """Average of all scores"""
+        count = self.count
+        return self.total / count if count else 0
+
+    def window_mean(self, size: int) -> float:
+        """Average of the most recent `size` scores"""
+        window = self.scores[-size:]
+        return sum(window) / len(window) if window else 0
+
+    def first(self) -> float:
+        if self.rollup:
+            return _float32_value(self.rollup.first_score)
+        return _float32_value(self.scores[0])
+
+    def latest(self) -> float:
+        return _float32_value(self.scores[-1])
+
+
+def compact_json_default(obj):
+    """json.dump hook writing score series in their compact form"""
+    if isinstance(obj, ScoreSeries):
+        return obj.encode()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def records_json_default(obj):
+    """json.dump hook writing score series as readable score records"""
+    if isinstance(obj, ScoreSeries):
+        return obj.to_records()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -4,8 +4,9 @@ Learning Buddy System - Fallback Mode
 Works without external LLM when GROQ is unavailable
 """
 
-from user_profile import UserProfile
+from user_profile import get_user_profile
 from interactive_quiz import InteractiveQuiz
+from study_timing import questions_for_minutes, seconds_per_question, suggested_quiz_length
 import json
 import os
 import random
@@ -16,7 +17,7 @@ class SimpleLearningBuddy:
     """Simplified Learning Buddy that works without external LLM"""
     
     def __init__(self, user_id: str = "default_user"):
-        self.user_profile = UserProfile(user_id)
+        self.user_profile = get_user_profile(user_id)
         self.quiz_system = InteractiveQuiz(self.user_profile)
     
     def get_dashboard(self):
@@ -35,7 +36,7 @@ class SimpleLearningBuddy:
             print(f"🔴 Need Attention: {', '.join(insights['struggling_topics'])}")
         
         print("\n📊 Current Topics & Mastery Levels:")
-        for topic, level in self.user_profile.progress.get('mastery_levels', {}).items():
+        for topic, level in self.user_profile.progress.mastery_levels.items():
             emoji = {"advanced": "🟢", "intermediate": "🟡", "beginner": "🔵", "struggling": "🔴"}
             print(f"  {emoji.get(level, '⚪')} {topic}: {level.title()}")
         
@@ -44,7 +45,6 @@ class SimpleLearningBuddy:
     def analyze_progress(self, topic: str = None):
         """Simple progress analysis without LLM"""
         insights = self.user_profile.get_learning_insights()
-        progress = self.user_profile.progress
         
         analysis = []
         analysis.append("📊 LEARNING PROGRESS ANALYSIS")
@@ -52,19 +52,19 @@ class SimpleLearningBuddy:
         
         if topic:
             analysis.append(f"🔍 Focus Topic: {topic}")
-            if topic in progress.get('mastery_levels', {}):
-                level = progress['mastery_levels'][topic]
+            level = self.user_profile.get_mastery_level(topic, None)
+            if level:
                 analysis.append(f"📈 Current Level: {level.title()}")
                 
-                if topic in progress.get('quiz_scores', {}):
-                    scores = progress['quiz_scores'][topic]
-                    avg_score = sum(s['score'] for s in scores) / len(scores)
-                    latest_score = scores[-1]['score']
+                scores = self.user_profile.get_topic_scores(topic)
+                if scores:
+                    avg_score = scores.mean()
+                    latest_score = scores.latest()
                     analysis.append(f"📋 Average Score: {avg_score:.1f}%")
-                    analysis.append(f"🎯 Latest Score: {latest_score}%")
+                    analysis.append(f"🎯 Latest Score: {latest_score:g}%")
                     
-                    if len(scores) > 1:
-                        trend = "improving" if latest_score > scores[0]['score'] else "needs attention"
+                    if scores.count > 1:
+                        trend = "improving" if latest_score > scores.first() else "needs attention"
                         analysis.append(f"📈 Trend: {trend}")
         
         analysis.append(f"\n📚 Overall Statistics:")
@@ -97,8 +97,8 @@ class SimpleLearningBuddy:
     
     def generate_explanation(self, topic: str, concept: str):
         """Simple explanation without LLM"""
-        user_style = self.user_profile.profile.get("preferred_explanation_style", "simple")
-        learning_style = self.user_profile.profile.get("learning_style", "visual")
+        user_style = self.user_profile.profile.preferred_explanation_style
+        learning_style = self.user_profile.profile.learning_style
         
         explanation = []
         explanation.append(f"💡 EXPLAINING: {concept} in {topic}")
@@ -167,13 +167,18 @@ class SimpleLearningBuddy:
     
     def create_weekly_plan(self, focus_topics: List[str] = None):
         """Create simple weekly learning plan"""
+        reviews = self.user_profile.reviews
         if focus_topics is None:
-            focus_topics = self.user_profile.progress.get("current_topics", [])[:3]
+            focus_topics = reviews.due_first(self.user_profile.progress.current_topics)[:3]
+        else:
+            focus_topics = reviews.due_first(focus_topics)
         
         if not focus_topics:
             focus_topics = ["Choose a topic to get started"]
         
-        time_available = self.user_profile.profile.get('time_availability', 30)
+        time_available = self.user_profile.profile.time_availability
+        due_reviews = reviews.reviews_by_weekday()
+        progress = self.user_profile.progress
         
         plan = []
         plan.append("📅 WEEKLY LEARNING PLAN")
@@ -186,11 +191,20 @@ class SimpleLearningBuddy:
         for i, day in enumerate(days):
             plan.append(f"\n📆 {day}:")
             
+            if due_reviews[day]:
+                due = ", ".join(f"{topic} ({count})" for topic, count in due_reviews[day].items())
+                # Sized from the learner's measured response times
+                review_minutes = sum(count * seconds_per_question(progress, topic)
+                                     for topic, count in due_reviews[day].items()) / 60
+                plan.append(f"  🔁 Spaced review due: {due} (~{max(1, round(review_minutes))} min)")
+            
             if i < len(focus_topics):
                 topic = focus_topics[i % len(focus_topics)]
+                quiz_length = questions_for_minutes(progress, topic, self.user_profile.get_mastery_level(topic),
+                                                    time_available / 2)
                 plan.append(f"  🎯 Focus: {topic}")
                 plan.append(f"  📖 Activity: Study core concepts ({time_available//2} min)")
-                plan.append(f"  🧠 Practice: Quiz or exercises ({time_available//2} min)")
+                plan.append(f"  🧠 Practice: {quiz_length}-question quiz or exercises ({time_available//2} min)")
             else:
                 plan.append(f"  🔄 Review: Previous topics ({time_available//2} min)")
                 plan.append(f"  📝 Reflection: Note what you've learned ({time_available//2} min)")
@@ -254,8 +268,8 @@ class SimpleLearningBuddy:
     
     def optimize_study_techniques(self, topic: str = None):
         """Get study technique recommendations"""
-        learning_style = self.user_profile.profile.get('learning_style', 'visual')
-        time_available = self.user_profile.profile.get('time_availability', 30)
+        learning_style = self.user_profile.profile.learning_style
+        time_available = self.user_profile.profile.time_availability
         
         techniques = []
         techniques.append("🎯 STUDY TECHNIQUE OPTIMIZATION")
@@ -318,7 +332,7 @@ class SimpleLearningBuddy:
         """Record quiz results and update user progress"""
         self.user_profile.record_activity(topic, score, time_spent)
         print(f"✅ Recorded quiz result: {score}% for {topic}")
-        print(f"📊 Updated mastery level: {self.user_profile.progress['mastery_levels'].get(topic, 'beginner')}")
+        print(f"📊 Updated mastery level: {self.user_profile.progress.mastery_levels.get(topic, 'beginner')}")
     
     def update_profile(self, **kwargs):
         """Update user profile"""
@@ -374,8 +388,9 @@ def main():
         elif choice == "4":
             topic = input("Enter topic for quiz: ").strip()
             if topic:
-                num_q = input("Number of questions (default 5): ").strip()
-                num_questions = int(num_q) if num_q.isdigit() else 5
+                default_questions = suggested_quiz_length(buddy.user_profile, topic)
+                num_q = input(f"Number of questions (default {default_questions}): ").strip()
+                num_questions = int(num_q) if num_q.isdigit() else default_questions
                 buddy.take_interactive_quiz(topic, num_questions)
             else:
                 print("❌ Please provide a topic.")
@@ -393,17 +408,18 @@ def main():
             print(f"\n🎯 STUDY OPTIMIZATION:\n{result}")
         elif choice == "8":
             print("\n✏️ UPDATE PROFILE")
-            style = input("Learning style (visual/auditory/kinesthetic/reading): ").strip().lower()
-            if style in ["visual", "auditory", "kinesthetic", "reading"]:
-                buddy.user_profile.update_profile(learning_style=style)
-            
-            exp_style = input("Explanation style (simple/detailed/analogies/examples): ").strip().lower()
-            if exp_style in ["simple", "detailed", "analogies", "examples"]:
-                buddy.user_profile.update_profile(preferred_explanation_style=exp_style)
-            
-            time_str = input("Daily study time in minutes: ").strip()
-            if time_str.isdigit():
-                buddy.user_profile.update_profile(time_availability=int(time_str))
+            with buddy.user_profile.batch_updates():
+                style = input("Learning style (visual/auditory/kinesthetic/reading): ").strip().lower()
+                if style in ["visual", "auditory", "kinesthetic", "reading"]:
+                    buddy.user_profile.update_profile(learning_style=style)
+                
+                exp_style = input("Explanation style (simple/detailed/analogies/examples): ").strip().lower()
+                if exp_style in ["simple", "detailed", "analogies", "examples"]:
+                    buddy.user_profile.update_profile(preferred_explanation_style=exp_style)
+                
+                time_str = input("Daily study time in minutes: ").strip()
+                if time_str.isdigit():
+                    buddy.user_profile.update_profile(time_availability=int(time_str))
             
             print("✅ Profile updated!")
         elif choice == "9":
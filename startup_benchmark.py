@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for Learning Buddy System
+Imports each entry point in fresh interpreters and reports its cold-start
+import time, the heaviest modules it pulls in and whether the LLM stack
+(crewai) was loaded; results can be appended to a JSONL file to track them
+across changes
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+ENTRY_POINTS = ["simple_buddy", "learning_buddy", "demo", "interactive_quiz", "quiz_engine", "quiz_api",
+                "learning_analytics"]
+RUNS = 5
+HEAVY_MODULES = 3  # heaviest direct imports listed per entry point
+
+# Runs in the child interpreter: time the import alone, then report what got loaded
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"import_ms": elapsed * 1000,
+                  "crewai": "crewai" in sys.modules,
+                  "numpy": "numpy" in sys.modules,
+                  "modules": len(sys.modules)}}))
+"""
+
+def parse_importtime(stderr: str, module: str) -> List[Dict]:
+    """Direct imports of `module` from -X importtime output, heaviest first"""
+    children, inside = [], False
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        # Entries are printed as imports finish, so a module's children come right before it
+        if depth == 1:
+            children.append({"module": name, "ms": int(cumulative) / 1000})
+        elif depth == 0:
+            if name == module:
+                inside = True
+                break
+            children = []
+    if not inside:
+        return []
+    return sorted(children, key=lambda child: child["ms"], reverse=True)
+
+def measure(module: str, runs: int = RUNS) -> Dict:
+    """Median and best cold-start timings of importing `module` over `runs` fresh interpreters"""
+    samples, heavy = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+                              capture_output=True, text=True)
+        process_ms = (time.perf_counter() - started) * 1000
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+            return {"module": module, "error": error}
+        sample = json.loads(proc.stdout.strip().splitlines()[-1])
+        sample["process_ms"] = process_ms
+        samples.append(sample)
+        heavy.append(parse_importtime(proc.stderr, module))
+
+    import_ms = [sample["import_ms"] for sample in samples]
+    median_run = import_ms.index(statistics.median_low(import_ms))
+    return {
+        "module": module,
+        "import_ms": round(statistics.median(import_ms), 1),
+        "import_ms_min": round(min(import_ms), 1),
+        "process_ms": round(statistics.median(sample["process_ms"] for sample in samples), 1),
+        "modules": samples[-1]["modules"],
+        "crewai": samples[-1]["crewai"],
+        "numpy": samples[-1]["numpy"],
+        "heaviest": [f"{child['module']} ({child['ms']:.0f} ms)"
+                     for child in heavy[median_run][:HEAVY_MODULES]]
+    }
+
+def print_report(results: List[Dict]):
+    print("⏱️  STARTUP BENCHMARK (median of fresh interpreters)")
+    print("=" * 50)
+    for result in results:
+        if "error" in result:
+            print(f"❌ {result['module']}: {result['error']}")
+            continue
+        loaded = [name for name in ("crewai", "numpy") if result[name]]
+        print(f"📦 {result['module']}: {result['import_ms']} ms import "
+              f"(best {result['import_ms_min']} ms, process {result['process_ms']} ms, "
+              f"{result['modules']} modules{', loads ' + ' + '.join(loaded) if loaded else ''})")
+        if result["heaviest"]:
+            print(f"   heaviest: {', '.join(result['heaviest'])}")
+
+def record(results: List[Dict], path: str):
+    """Append a run to a JSONL history file so cold-start latency can be tracked"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    entry = {"timestamp": datetime.now().isoformat(), "python": sys.version.split()[0], "results": results}
+    with open(path, 'a', encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the entry points")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS, help="Entry point modules to import")
+    parser.add_argument("--runs", type=int, default=RUNS, help="Fresh interpreters per entry point")
+    parser.add_argument("--record", metavar="PATH", help="Append the results to a JSONL history file")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    results = [measure(module, args.runs) for module in args.modules]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+    if args.record:
+        record(results, args.record)
+        print(f"📝 Recorded to {args.record}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Study timing for Learning Buddy System
+Quizzes are timed per question and per session on the monotonic clock; recent
+response times are kept per topic and mastery level so analytics and planners
+work from measured durations instead of fixed estimates
+"""
+
+import math
+import time
+from typing import Dict, List, Optional
+
+TIMING_WINDOW = 100                 # recent timings kept per topic and level, and for sessions
+DEFAULT_SECONDS_PER_QUESTION = 120  # until a user has answered any timed question
+MAX_SUGGESTED_QUESTIONS = 10
+
+
+class QuizTimer:
+    """Monotonic timing of one quiz session and each of its questions"""
+
+    __slots__ = ("started", "question_started", "question_ms")
+
+    def __init__(self, elapsed_seconds: float = 0.0, question_ms: List[int] = None):
+        # A resumed quiz continues from the time already spent on it
+        self.started = time.monotonic() - elapsed_seconds
+        self.question_started = time.monotonic()
+        self.question_ms: List[int] = list(question_ms or [])
+
+    def question_shown(self):
+        """Start (or restart) the clock for the current question"""
+        self.question_started = time.monotonic()
+
+    def question_answered(self) -> int:
+        """Stop the current question's clock; returns its response time in milliseconds"""
+        elapsed = round((time.monotonic() - self.question_started) * 1000)
+        self.question_ms.append(elapsed)
+        return elapsed
+
+    def elapsed_seconds(self) -> float:
+        return time.monotonic() - self.started
+
+    def elapsed_minutes(self) -> float:
+        return round(self.elapsed_seconds() / 60, 2)
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile (0-100) of unsorted values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * p / 100))
+    return ordered[rank - 1]
+
+def record_timings(progress, record: Dict):
+    """Fold an activity record's timings into the progress document's recent windows"""
+    if record["time"] > 0:
+        progress.session_times.append(round(record["time"] * 60))
+        del progress.session_times[:-TIMING_WINDOW]
+
+    question_ms = record.get("q_ms")
+    if question_ms:
+        levels = progress.response_times.setdefault(record["topic"], {})
+        window = levels.setdefault(record.get("level") or "beginner", [])
+        window.extend(question_ms)
+        del window[:-TIMING_WINDOW]
+
+def latency_distribution(progress) -> Dict[str, Dict[str, Dict]]:
+    """{topic: {level: {"count", "p50", "p90"}}} of question response times in seconds"""
+    return {
+        topic: {
+            level: {
+                "count": len(window),
+                "p50": round(percentile(window, 50) / 1000, 1),
+                "p90": round(percentile(window, 90) / 1000, 1)
+            }
+            for level, window in levels.items() if window
+        }
+        for topic, levels in progress.response_times.items()
+    }
+
+def average_session_minutes(progress) -> Optional[float]:
+    sessions = progress.session_times
+    return round(sum(sessions) / len(sessions) / 60, 1) if sessions else None
+
+def seconds_per_question(progress, topic: str = None, level: str = None) -> float:
+    """Median response time for the topic and level, falling back to the topic, then to all topics"""
+    levels = progress.response_times.get(topic, {}) if topic else {}
+    candidates = [
+        levels.get(level, []),
+        [ms for window in levels.values() for ms in window],
+        [ms for topic_levels in progress.response_times.values() for window in topic_levels.values()
+         for ms in window]
+    ]
+    for window in candidates:
+        if window:
+            return percentile(window, 50) / 1000
+    return DEFAULT_SECONDS_PER_QUESTION
+
+def questions_for_minutes(progress, topic: str, level: str, minutes: float) -> int:
+    """How many questions fit in `minutes` at the learner's measured pace (at least one)"""
+    pace = seconds_per_question(progress, topic, level)
+    return max(1, min(MAX_SUGGESTED_QUESTIONS, int(minutes * 60 // pace)))
+
+def suggested_quiz_length(user_profile, topic: str) -> int:
+    """Quiz size that fits the practice half of the learner's daily time"""
+    return questions_for_minutes(user_profile.progress, topic, user_profile.get_mastery_level(topic),
+                                 user_profile.profile.time_availability / 2)
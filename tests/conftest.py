@@ -0,0 +1,14 @@
+"""
+Shared test setup: modules import from the repository root and read its config.json
+whatever directory a test runs in
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import config_loader  # noqa: E402
+
+config_loader.CONFIG_FILE = os.path.join(ROOT, "config.json")
@@ -0,0 +1,59 @@
+"""
+Tests for adaptive question selection across consecutive quizzes
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import adaptive_selection  # noqa: E402
+import question_bank  # noqa: E402
+from adaptive_selection import ItemParameters  # noqa: E402
+from interactive_quiz import InteractiveQuiz  # noqa: E402
+from profile_storage import JSONFileStorage  # noqa: E402
+from user_profile import UserProfile  # noqa: E402
+
+TOPIC = "Machine Learning"
+
+
+@pytest.fixture
+def bank(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bank = question_bank.QuestionBank([
+        {"topic": TOPIC, "level": level, "type": "true-false", "question": f"{TOPIC} statement {level} {i}",
+         "options": ["True", "False"], "correct": "True", "explanation": ""}
+        for level in ("beginner", "intermediate", "advanced") for i in range(10)
+    ])
+    monkeypatch.setattr(question_bank, "_question_bank", bank)
+    monkeypatch.setattr(adaptive_selection, "_item_parameters",
+                        ItemParameters(bank, path=str(tmp_path / "item_parameters.json")))
+    return bank
+
+
+def run_quiz(user_profile, num_questions, answer):
+    quiz = InteractiveQuiz(user_profile)
+    selector = quiz.create_selector(TOPIC)
+    served = 0
+    for question in quiz.iter_adaptive_questions(TOPIC, num_questions, selector):
+        selector.record(question, answer(served))
+        served += 1
+    selector.save()
+    return served, selector
+
+
+def test_every_quiz_in_a_row_gets_its_full_length(bank, tmp_path):
+    user_profile = UserProfile("learner", storage=JSONFileStorage(str(tmp_path / "profiles")), write_behind=False)
+    for _ in range(6):
+        served, _ = run_quiz(user_profile, 5, lambda i: i % 2 == 0)
+        assert served == 5
+
+
+def test_stored_ability_stays_responsive(bank, tmp_path):
+    user_profile = UserProfile("learner", storage=JSONFileStorage(str(tmp_path / "profiles")), write_behind=False)
+    for _ in range(5):
+        run_quiz(user_profile, 5, lambda i: False)
+    _, selector = run_quiz(user_profile, 5, lambda i: False)
+    before = selector.theta
+    # A run of correct answers still moves a well-practised learner's ability noticeably
+    _, selector = run_quiz(user_profile, 5, lambda i: True)
+    assert selector.theta - before > 0.5
@@ -0,0 +1,246 @@
+"""
+Tests for the profile storage backends: JSON and SQLite round trips and
+replaying the activity log after a crash
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+import config_loader
+
+from profile_storage import JSONFileStorage, SQLiteStorage
+from user_profile import UserProfile, UserProfileRegistry
+
+ACTIVITIES = [
+    ("Calculus", 55, 20),
+    ("Calculus", 80, 30),
+    ("Physics", 90, 25),
+    ("Physics", None, 15),  # study time without a quiz
+    ("Calculus", 95, 10),
+]
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_dir(tmp_path, monkeypatch):
+    # Profiles create their working directories relative to the current directory
+    monkeypatch.chdir(tmp_path)
+
+
+def record_all(user_profile, activities=ACTIVITIES):
+    for topic, score, minutes in activities:
+        user_profile.record_activity(topic, score, minutes)
+
+
+def progress_state(user_profile):
+    progress = user_profile.progress
+    return {
+        "activity_seq": progress.activity_seq,
+        "total_study_time": progress.total_study_time,
+        "current_topics": list(progress.current_topics),
+        "mastery_levels": dict(progress.mastery_levels),
+        "quiz_scores": {topic: [record["score"] for record in scores.to_records()]
+                        for topic, scores in progress.quiz_scores.items()},
+        "last_activity": progress.last_activity
+    }
+
+
+@pytest.fixture(params=["flat", "sharded", "sqlite"])
+def make_storage(request, tmp_path):
+    """Factory for a fresh storage instance over the same location, as after a restart"""
+    opened = []
+
+    def make():
+        if request.param == "sqlite":
+            storage = SQLiteStorage(str(tmp_path / "learning_buddy.db"))
+            opened.append(storage)
+            return storage
+        return JSONFileStorage(str(tmp_path / "profiles"), layout=request.param)
+
+    yield make
+    for storage in opened:
+        storage.close()
+
+
+def test_round_trip(make_storage):
+    user_profile = UserProfile("alice", storage=make_storage(), write_behind=False)
+    user_profile.update_profile(learning_style="auditory", goals=["Pass calculus"])
+    record_all(user_profile)
+    expected = progress_state(user_profile)
+
+    reloaded = UserProfile("alice", storage=make_storage(), write_behind=False)
+    assert reloaded.profile.learning_style == "auditory"
+    assert reloaded.profile.goals == ["Pass calculus"]
+    assert progress_state(reloaded) == expected
+    assert expected["activity_seq"] == len(ACTIVITIES)
+    assert expected["quiz_scores"] == {"Calculus": [55, 80, 95], "Physics": [90]}
+    assert expected["total_study_time"] == 100
+
+
+def test_round_trip_after_full_snapshot(make_storage):
+    user_profile = UserProfile("bob", storage=make_storage(), write_behind=False)
+    record_all(user_profile)
+    user_profile.save_progress()
+    record_all(user_profile, ACTIVITIES[:2])
+    expected = progress_state(user_profile)
+
+    reloaded = UserProfile("bob", storage=make_storage(), write_behind=False)
+    assert progress_state(reloaded) == expected
+    assert expected["activity_seq"] == len(ACTIVITIES) + 2
+
+
+def test_unknown_user_loads_defaults(make_storage):
+    user_profile = UserProfile("nobody", storage=make_storage(), write_behind=False)
+    assert user_profile.progress.activity_seq == 0
+    assert user_profile.progress.quiz_scores == {}
+
+
+def test_loading_does_not_write(make_storage, tmp_path):
+    record_all(UserProfile("carol", storage=make_storage(), write_behind=False))
+    before = {path: os.path.getmtime(path) for path in _files(tmp_path)}
+
+    UserProfile("carol", storage=make_storage(), write_behind=False).progress
+    assert {path: os.path.getmtime(path) for path in _files(tmp_path)} == before
+
+
+def _files(root):
+    return [os.path.join(directory, name) for directory, _, names in os.walk(root) for name in names]
+
+
+class TestActivityLogReplay:
+    """The JSON backend appends activities to a log and only rewrites the snapshot periodically"""
+
+    def storage(self, tmp_path):
+        return JSONFileStorage(str(tmp_path / "profiles"))
+
+    def test_replays_activities_newer_than_the_snapshot(self, tmp_path):
+        storage = self.storage(tmp_path)
+        user_profile = UserProfile("dave", storage=storage, write_behind=False)
+        record_all(user_profile, ACTIVITIES[:2])
+        user_profile.save_progress()
+        record_all(user_profile, ACTIVITIES[2:])
+        expected = progress_state(user_profile)
+
+        # Only the activities after the snapshot are still in the log
+        with open(storage.activity_log_file("dave")) as f:
+            assert [json.loads(line)["n"] for line in f] == [3, 4, 5]
+
+        reloaded = UserProfile("dave", storage=self.storage(tmp_path), write_behind=False)
+        assert progress_state(reloaded) == expected
+
+    def test_torn_final_line_is_ignored(self, tmp_path):
+        storage = self.storage(tmp_path)
+        user_profile = UserProfile("erin", storage=storage, write_behind=False)
+        record_all(user_profile)
+        expected = progress_state(user_profile)
+
+        # The process died halfway through appending the next record
+        with open(storage.activity_log_file("erin"), "a") as f:
+            f.write('{"n": 6, "topic": "Calc')
+
+        reloaded = UserProfile("erin", storage=self.storage(tmp_path), write_behind=False)
+        assert progress_state(reloaded) == expected
+
+        # Activity recorded after the restart is appended after the torn line, not onto it
+        reloaded.record_activity("Calculus", 98, 5)
+        expected = progress_state(reloaded)
+        again = UserProfile("erin", storage=self.storage(tmp_path), write_behind=False)
+        assert progress_state(again) == expected
+        assert expected["quiz_scores"]["Calculus"] == [55, 80, 95, 98]
+
+    def test_crash_before_log_truncation_does_not_double_count(self, tmp_path):
+        storage = self.storage(tmp_path)
+        user_profile = UserProfile("frank", storage=storage, write_behind=False)
+        record_all(user_profile)
+        expected = progress_state(user_profile)
+        with open(storage.activity_log_file("frank")) as f:
+            log = f.read()
+
+        # Snapshot written, then the process died before the log was truncated
+        user_profile.save_progress()
+        with open(storage.activity_log_file("frank"), "w") as f:
+            f.write(log)
+
+        reloaded = UserProfile("frank", storage=self.storage(tmp_path), write_behind=False)
+        assert progress_state(reloaded) == expected
+
+    def test_write_behind_records_flushed_before_exit_are_replayed(self, tmp_path):
+        storage = self.storage(tmp_path)
+        user_profile = UserProfile("grace", storage=storage, write_behind=True)
+        record_all(user_profile)
+        assert user_profile.has_unsaved_changes()
+        user_profile.flush()
+        expected = progress_state(user_profile)
+
+        reloaded = UserProfile("grace", storage=self.storage(tmp_path), write_behind=False)
+        assert progress_state(reloaded) == expected
+
+
+def test_registry_returns_evicted_profiles_still_in_use(tmp_path):
+    registry = UserProfileRegistry(max_profiles=1, storage=JSONFileStorage(str(tmp_path / "profiles")))
+    held = registry.get("heidi")  # e.g. by an open quiz session
+    registry.get("ivan")           # evicts heidi from the cache
+    assert registry.stats()["evictions"] == 1
+    assert registry.get("heidi") is held
+
+    held.record_activity("Calculus", 70, 10)
+    registry.get("heidi").record_activity("Calculus", 90, 10)
+    reloaded = UserProfile("heidi", storage=JSONFileStorage(str(tmp_path / "profiles")), write_behind=False)
+    assert progress_state(reloaded)["quiz_scores"] == {"Calculus": [70, 90]}
+
+
+def test_retention_keeps_stored_history_bounded(make_storage, monkeypatch, tmp_path):
+    # Everything but the last three attempts is past a zero-day retention window
+    monkeypatch.setitem(config_loader.load_config().setdefault("system_config", {}),
+                        "analytics_retention_days", 0)
+    storage = make_storage()
+    user_profile = UserProfile("judy", storage=storage, write_behind=False)
+    record_all(user_profile, [("Calculus", score, 5) for score in range(50, 100, 5)])
+    if not isinstance(storage, SQLiteStorage):
+        # The JSON snapshot is rewritten every ACTIVITY_LOG_COMPACT_EVERY appends; force it here
+        user_profile.save_progress()
+
+    reloaded = UserProfile("judy", storage=make_storage(), write_behind=False)
+    scores = reloaded.progress.quiz_scores["Calculus"]
+    assert scores.count == 10
+    assert scores.mean() == pytest.approx(72.5)
+    assert [record["score"] for record in scores.to_records()] == [85, 90, 95]
+    if isinstance(storage, SQLiteStorage):
+        assert storage.conn.execute("SELECT COUNT(*) FROM quiz_scores").fetchone()[0] == 3
+        assert storage.conn.execute("SELECT COUNT(*) FROM score_rollups").fetchone()[0] == 1
+
+
+SIGTERM_DURING_RECORD = """
+import os, signal, sys
+sys.path.insert(0, {root!r})
+from profile_storage import JSONFileStorage
+from user_profile import UserProfile
+
+user_profile = UserProfile("kai", storage=JSONFileStorage("profiles"), write_behind=True)
+user_profile.record_activity("Calculus", 60, 10)
+apply_activity = UserProfile.apply_activity
+
+def apply_and_terminate(progress, record):
+    apply_activity(progress, record)
+    os.kill(os.getpid(), signal.SIGTERM)  # lands before the record is buffered
+
+user_profile.apply_activity = apply_and_terminate
+user_profile.record_activity("Calculus", 90, 10)
+user_profile.apply_activity = apply_activity
+user_profile.record_activity("Calculus", 30, 10)  # never reached
+"""
+
+
+def test_sigterm_during_a_mutation_lets_it_finish_then_flushes(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = SIGTERM_DURING_RECORD.format(root=root)
+    exited = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, timeout=60)
+    assert exited.returncode == 128 + signal.SIGTERM
+
+    reloaded = UserProfile("kai", storage=JSONFileStorage(str(tmp_path / "profiles")), write_behind=False)
+    assert progress_state(reloaded)["quiz_scores"] == {"Calculus": [60, 90]}
+    assert reloaded.progress.activity_seq == 2
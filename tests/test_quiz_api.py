@@ -0,0 +1,50 @@
+"""
+Tests for the headless quiz API's answer sheet grading
+"""
+
+import pytest
+
+from quiz_api import QuizService, QuizSession
+from user_profile import get_user_profile
+
+QUESTIONS = [
+    {"type": "multiple-choice", "question": "2 + 2?", "options": ["A) 3", "B) 4", "C) 5", "D) 6"],
+     "correct": "B", "explanation": "Four"},
+    {"type": "true-false", "question": "3 is prime", "options": ["True", "False"],
+     "correct": "True", "explanation": "Only 1 and 3 divide it"},
+]
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return QuizService()
+
+
+def open_session(service, user_id):
+    session = QuizSession(user_id, "Arithmetic", QUESTIONS)
+    service.sessions[session.session_id] = session
+    return session.session_id
+
+
+@pytest.mark.parametrize("answers", [{}, [], ["", "maybe"], {"q1": None}])
+def test_empty_sheet_is_rejected_and_not_recorded(service, answers, tmp_path):
+    # Profiles are cached process-wide, so every case gets its own learner
+    user_id = f"lee_{tmp_path.name}"
+    session_id = open_session(service, user_id)
+    with pytest.raises(ValueError):
+        service.submit_answers(session_id, answers)
+    assert get_user_profile(user_id).progress.quiz_scores == {}
+
+    # The session stays open for the real answers
+    result = service.submit_answers(session_id, ["B", "F"])
+    assert result["score"] == 50
+
+
+def test_empty_sheet_in_a_batch_is_an_error_entry(service):
+    empty, answered = open_session(service, "mo"), open_session(service, "mo")
+    results = service.submit_batch([{"session_id": empty, "answers": {}},
+                                    {"session_id": answered, "answers": {"q1": "B", "q2": "T"}}])
+    assert "error" in results[0]
+    assert results[1]["score"] == 100
+    assert get_user_profile("mo").progress.quiz_scores["Arithmetic"].count == 1
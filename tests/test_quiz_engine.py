@@ -0,0 +1,38 @@
+"""
+Tests for the async quiz engine: sessions of one user don't step on each other
+"""
+
+import asyncio
+
+import pytest
+
+from profile_storage import JSONFileStorage
+from quiz_engine import QuizEngine
+from user_profile import UserProfile
+
+QUESTIONS = [
+    {"type": "multiple-choice", "question": f"Question {number}", "options": ["A) 1", "B) 2", "C) 3", "D) 4"],
+     "correct": "B", "explanation": "Two"}
+    for number in range(1, 4)
+]
+
+
+@pytest.fixture
+def user_profile(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return UserProfile("kim", storage=JSONFileStorage(str(tmp_path / "profiles")), write_behind=False)
+
+
+def test_overlapping_answers_grade_the_question_once(user_profile):
+    async def run():
+        engine = QuizEngine()
+        started = await engine.start_session("kim", "Calculus", user_profile=user_profile,
+                                             questions=QUESTIONS)
+        # A double submit: the second answer arrives while the first is still being saved
+        first, second = await asyncio.gather(engine.answer(started["session_id"], "B"),
+                                             engine.answer(started["session_id"], "B"))
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["valid"] and first["question"]["number"] == 2
+    assert second == {"valid": False, "busy": True, "state": first["state"], "question": first["question"]}
@@ -0,0 +1,36 @@
+"""
+Tests for the quiz prefetch pool's miss handling
+"""
+
+import threading
+import time
+
+from quiz_prefetch import QuizPrefetchPool
+
+
+def blocked_generator(release):
+    def generate(topic, mastery_level, num_questions):
+        release.wait()
+        raise RuntimeError("no LLM in tests")
+    return generate
+
+
+def test_miss_does_not_wait_for_a_slow_refill():
+    release = threading.Event()
+    pool = QuizPrefetchPool(blocked_generator(release), target_depth=1, quiz_size=5, miss_wait=0.05)
+    try:
+        assert pool.take("Calculus", "beginner") is None  # queues the refill
+        started = time.monotonic()
+        assert pool.take("Calculus", "beginner") is None  # refill still running
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+        pool.wait_idle()
+    assert pool.metrics()["misses"] == 2
+
+
+def test_oversized_request_queues_no_refill():
+    pool = QuizPrefetchPool(blocked_generator(threading.Event()), target_depth=2, quiz_size=5)
+    assert pool.take("Calculus", "beginner", num_questions=10) is None
+    assert pool.metrics()["pending_refills"] == 0
+    assert pool.worker is None
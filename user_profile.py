@@ -1,121 +1,426 @@
-import json
+import atexit
 import os
+import signal
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
+from config_loader import get_setting
+from learning_aggregates import LearningAggregates
+from profile_storage import get_default_storage
+from quiz_checkpoint import QuizCheckpointStore
+from review_scheduler import ReviewScheduler
+from schema import Profile, Progress
+from score_series import ScoreSeries
+from study_timing import record_timings
+
+# Profiles holding unsaved changes, flushed at interpreter exit or on SIGTERM
+_dirty_profiles = weakref.WeakSet()
+_atexit_hook_installed = False
+_sigterm_hook_installed = False
+_previous_sigterm_handler = None
+_pending_signal = None  # SIGTERM that arrived while the main thread held a profile lock
+_held_locks = threading.local()  # per-thread count of profile locks held
+_directories_ready = False
+
+def flush_all_profiles():
+    """Flush every profile with pending write-behind changes"""
+    for user_profile in list(_dirty_profiles):
+        user_profile.flush()
+
+def flush_profiles(profiles: List["UserProfile"]):
+    """Flush several profiles, writing their buffered activities in one grouped call per storage"""
+    groups = {}
+    for user_profile in profiles:
+        groups.setdefault(id(user_profile.storage), []).append(user_profile)
+    
+    for group in groups.values():
+        batches = []
+        taken = []
+        for user_profile in group:
+            with user_profile.lock:
+                if user_profile.flush_timer is not None:
+                    user_profile.flush_timer.cancel()
+                    user_profile.flush_timer = None
+                if user_profile.profile_dirty:
+                    user_profile.save_profile()
+                    user_profile.profile_dirty = False
+                if user_profile.pending_activities:
+                    records, user_profile.pending_activities = user_profile.pending_activities, []
+                    batches.append((user_profile.user_id, user_profile.encode_progress(), records))
+                    taken.append((user_profile, records))
+        
+        try:
+            if batches:
+                group[0].storage.append_activity_batches(batches)
+        except Exception:
+            # Put the records back so a later flush retries them
+            for user_profile, records in taken:
+                with user_profile.lock:
+                    user_profile.pending_activities = records + user_profile.pending_activities
+            raise
+        
+        for user_profile in group:
+            with user_profile.lock:
+                if not user_profile.pending_activities and not user_profile.profile_dirty:
+                    _dirty_profiles.discard(user_profile)
+
+@contextmanager
+def batch_profile_updates(profiles: List["UserProfile"]):
+    """Defer writes for several profiles and flush them together when the block ends"""
+    for user_profile in profiles:
+        with user_profile.lock:
+            user_profile.batch_depth += 1
+    try:
+        yield profiles
+    finally:
+        for user_profile in profiles:
+            with user_profile.lock:
+                user_profile.batch_depth -= 1
+        flush_profiles([user_profile for user_profile in profiles if user_profile.batch_depth == 0])
+
+def _install_exit_hooks():
+    """Register the exit and signal flush hooks once per process
+    
+    Signal handlers can only be set from the main thread, so when the first dirty
+    profile comes from a worker thread the SIGTERM hook waits for a later main-thread call.
+    """
+    global _atexit_hook_installed, _sigterm_hook_installed, _previous_sigterm_handler
+    if not _atexit_hook_installed:
+        _atexit_hook_installed = True
+        atexit.register(flush_all_profiles)
+    
+    if _sigterm_hook_installed or threading.current_thread() is not threading.main_thread():
+        return
+    _sigterm_hook_installed = True
+    _previous_sigterm_handler = signal.getsignal(signal.SIGTERM)
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+
+def _handle_sigterm(signum, frame):
+    """Exit through the atexit flush, but never from inside a profile mutation
+    
+    The handler runs on the main thread between bytecodes; if that thread is halfway through
+    record_activity or a flush, flushing here would write half-updated progress. The exit is
+    deferred until the main thread releases its last profile lock instead.
+    """
+    global _pending_signal
+    if getattr(_held_locks, "depth", 0):
+        _pending_signal = signum
+        return
+    _pending_signal = None
+    if callable(_previous_sigterm_handler):
+        flush_all_profiles()
+        _previous_sigterm_handler(signum, frame)
+    else:
+        sys.exit(128 + signum)
+
+class ProfileLock:
+    """Reentrant profile lock that holds back a SIGTERM exit until the main thread lets go"""
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+    
+    def __enter__(self):
+        self._lock.acquire()
+        _held_locks.depth = getattr(_held_locks, "depth", 0) + 1
+        return self
+    
+    def __exit__(self, *exc_info):
+        _held_locks.depth -= 1
+        self._lock.release()
+        if _pending_signal is not None and _held_locks.depth == 0 \
+                and threading.current_thread() is threading.main_thread():
+            _handle_sigterm(_pending_signal, None)
 
 class UserProfile:
     """Manages user learning profile and preferences"""
     
-    def __init__(self, user_id: str = "default_user"):
+    def __init__(self, user_id: str = "default_user", storage=None, write_behind: bool = None):
         self.user_id = user_id
-        self.profile_file = f"user_profiles/{user_id}_profile.json"
-        self.progress_file = f"user_profiles/{user_id}_progress.json"
+        self.storage = storage or get_default_storage()
+        
+        # Write-behind: mutations mark state dirty and are flushed together
+        if write_behind is None:
+            write_behind = get_setting("system_config", "write_behind", False)
+        self.write_behind = write_behind
+        if write_behind:
+            # Profiles are often built on the main thread and first dirtied in worker threads
+            _install_exit_hooks()
+        self.auto_save_interval = get_setting("system_config", "auto_save_interval", 300)
+        self.auto_save_every = get_setting("system_config", "auto_save_every", 50)
+        self.profile_dirty = False
+        self.pending_activities = []
+        self.batch_depth = 0
+        self.flush_timer = None
+        self.lock = ProfileLock()
+        
+        # Profile and progress are loaded on first access
+        self._profile = None
+        self._progress = None
+        self._aggregates = None
+        self._reviews = None
+        self._quiz_checkpoints = None
+        
         self.ensure_directories()
-        self.profile = self.load_profile()
-        self.progress = self.load_progress()
+    
+    @property
+    def profile(self) -> Profile:
+        if self._profile is None:
+            self._profile = self.load_profile()
+        return self._profile
+    
+    @profile.setter
+    def profile(self, profile: Profile):
+        self._profile = profile
+    
+    @property
+    def progress(self) -> Progress:
+        if self._progress is None:
+            with self.lock:
+                if self._progress is None:
+                    progress = self.load_progress()
+                    self._aggregates = LearningAggregates.rebuild(progress)
+                    self._progress = progress
+        return self._progress
+    
+    @progress.setter
+    def progress(self, progress: Progress):
+        self._progress = progress
+        self._aggregates = LearningAggregates.rebuild(progress)
+    
+    @property
+    def aggregates(self) -> LearningAggregates:
+        self.progress
+        return self._aggregates
+    
+    @property
+    def reviews(self) -> ReviewScheduler:
+        """Spaced-repetition schedule of the questions this user has answered"""
+        if self._reviews is None:
+            self._reviews = ReviewScheduler.load(self.user_id)
+        return self._reviews
+    
+    @property
+    def quiz_checkpoints(self) -> QuizCheckpointStore:
+        """Unfinished quizzes this user can resume"""
+        if self._quiz_checkpoints is None:
+            self._quiz_checkpoints = QuizCheckpointStore(self.user_id)
+        return self._quiz_checkpoints
     
     def ensure_directories(self):
-        """Ensure necessary directories exist"""
+        """Ensure necessary directories exist (once per process)"""
+        global _directories_ready
+        if _directories_ready:
+            return
         os.makedirs("user_profiles", exist_ok=True)
         os.makedirs("learning_data", exist_ok=True)
         os.makedirs("quizzes", exist_ok=True)
+        _directories_ready = True
     
-    def load_profile(self) -> Dict:
-        """Load user profile from file"""
-        if os.path.exists(self.profile_file):
-            with open(self.profile_file, 'r') as f:
-                return json.load(f)
-        return {
-            "user_id": self.user_id,
-            "learning_style": "visual",  # visual, auditory, kinesthetic, reading
-            "difficulty_preference": "intermediate",
-            "interests": [],
-            "goals": [],
-            "time_availability": 30,  # minutes per day
-            "preferred_explanation_style": "simple",  # simple, detailed, analogies, examples
-            "strengths": [],
-            "weaknesses": [],
-            "created_at": datetime.now().isoformat()
-        }
+    def load_profile(self) -> Profile:
+        """Load user profile from storage"""
+        return Profile.decode(self.storage.load_profile(self.user_id), user_id=self.user_id)
     
-    def load_progress(self) -> Dict:
-        """Load user progress from file"""
-        if os.path.exists(self.progress_file):
-            with open(self.progress_file, 'r') as f:
-                return json.load(f)
-        return {
-            "topics_completed": [],
-            "quiz_scores": {},
-            "learning_streaks": 0,
-            "total_study_time": 0,
-            "last_activity": None,
-            "current_topics": [],
-            "mastery_levels": {}
-        }
+    def load_progress(self) -> Progress:
+        """Load user progress from storage and replay any logged activity (reads never write)"""
+        progress = Progress.decode(self.storage.load_progress(self.user_id))
+        
+        for record in self.storage.load_activity_log(self.user_id, progress.activity_seq):
+            self.apply_activity(progress, record)
+        return progress
+    
+    def encode_progress(self) -> Dict:
+        """Progress document for a write, with scores past the retention window folded first
+        
+        Compacting on the write path keeps stored snapshots bounded without loads rewriting files.
+        """
+        self.compact_history(self.progress)
+        return self.progress.encode()
+    
+    @staticmethod
+    def compact_history(progress: Progress, retention_days: int = None) -> int:
+        """Fold quiz scores older than the retention window into per-topic aggregates"""
+        if retention_days is None:
+            retention_days = get_setting("system_config", "analytics_retention_days", 90)
+        cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+        return sum(scores.compact(cutoff) for scores in progress.quiz_scores.values())
     
     def save_profile(self):
-        """Save user profile to file"""
-        with open(self.profile_file, 'w') as f:
-            json.dump(self.profile, f, indent=2)
+        """Save user profile to storage"""
+        self.storage.save_profile(self.user_id, self.profile.encode())
     
     def save_progress(self):
-        """Save user progress to file"""
-        with open(self.progress_file, 'w') as f:
-            json.dump(self.progress, f, indent=2)
+        """Save a full progress snapshot to storage"""
+        self.storage.save_progress(self.user_id, self.encode_progress())
     
     def update_profile(self, **kwargs):
         """Update user profile"""
-        self.profile.update(kwargs)
-        self.save_profile()
+        with self.lock:
+            self.profile.update(kwargs)
+            if self.deferring_writes():
+                self.profile_dirty = True
+                self.mark_dirty()
+            else:
+                self.save_profile()
     
-    def record_activity(self, topic: str, score: float = None, study_time: int = 0):
-        """Record learning activity"""
-        self.progress["last_activity"] = datetime.now().isoformat()
-        self.progress["total_study_time"] += study_time
+    def record_activity(self, topic: str, score: float = None, study_time: float = 0,
+                        question_times: List[int] = None, level: str = None):
+        """Record learning activity; question_times are per-question response times in ms at `level`"""
+        record = {
+            "n": self.progress.activity_seq + 1,
+            "topic": topic,
+            "score": score,
+            "time": study_time,
+            "date": datetime.now().isoformat()
+        }
+        if question_times:
+            record["q_ms"] = list(question_times)
+            record["level"] = level or self.get_mastery_level(topic)
+        with self.lock:
+            self.apply_activity(self.progress, record)
+            self.aggregates.observe(self.progress, record)
+            if self.deferring_writes():
+                self.pending_activities.append(record)
+                self.mark_dirty()
+            else:
+                self.storage.append_activity(self.user_id, self.encode_progress(), record)
+    
+    def deferring_writes(self) -> bool:
+        """Whether mutations are currently buffered instead of written through"""
+        return self.write_behind or self.batch_depth > 0
+    
+    def mark_dirty(self):
+        """Track unsaved changes and schedule a flush"""
+        _install_exit_hooks()
+        _dirty_profiles.add(self)
         
-        if topic not in self.progress["current_topics"]:
-            self.progress["current_topics"].append(topic)
+        if len(self.pending_activities) >= self.auto_save_every:
+            self.flush()
+        elif self.write_behind and self.batch_depth == 0 and self.flush_timer is None:
+            self.flush_timer = threading.Timer(self.auto_save_interval, self.flush)
+            self.flush_timer.daemon = True
+            self.flush_timer.start()
+    
+    def flush(self):
+        """Write buffered profile and activity changes in one go"""
+        with self.lock:
+            if self.flush_timer is not None:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+            
+            if self.profile_dirty:
+                self.save_profile()
+                self.profile_dirty = False
+            if self.pending_activities:
+                self.storage.append_activities(self.user_id, self.encode_progress(), self.pending_activities)
+                self.pending_activities = []
+            
+            _dirty_profiles.discard(self)
+    
+    @contextmanager
+    def batch_updates(self):
+        """Group every mutation inside the block into a single flush"""
+        with self.lock:
+            self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.batch_depth -= 1
+                if self.batch_depth == 0:
+                    self.flush()
+    
+    def get_topic_scores(self, topic: str) -> ScoreSeries:
+        """Get the score history for a single topic
+        
+        Before the progress document is loaded, an indexed backend answers from its
+        (user_id, topic, date) index; once loaded, memory is authoritative (it also holds
+        buffered write-behind activity) and faster than any query.
+        """
+        if self._progress is None and self.storage.indexed:
+            # Indexed lookup without loading the whole progress document
+            return self.storage.topic_scores(self.user_id, topic)
+        return self.progress.quiz_scores.get(topic) or ScoreSeries()
+    
+    def get_mastery_level(self, topic: str, default: str = "beginner") -> str:
+        """Get the mastery level for a single topic"""
+        if self._progress is None and self.storage.indexed:
+            return self.storage.mastery_level(self.user_id, topic) or default
+        return self.progress.mastery_levels.get(topic, default)
+    
+    @staticmethod
+    def apply_activity(progress: Progress, record: Dict):
+        """Apply a single activity record to progress"""
+        topic = record["topic"]
+        score = record["score"]
+        
+        progress.activity_seq = record["n"]
+        progress.last_activity = record["date"]
+        progress.total_study_time += record["time"]
+        record_timings(progress, record)
+        
+        if topic not in progress.current_topics:
+            progress.current_topics.append(topic)
         
         if score is not None:
-            if topic not in self.progress["quiz_scores"]:
-                self.progress["quiz_scores"][topic] = []
-            self.progress["quiz_scores"][topic].append({
-                "score": score,
-                "date": datetime.now().isoformat()
-            })
+            if topic not in progress.quiz_scores:
+                progress.quiz_scores[topic] = ScoreSeries()
+            progress.quiz_scores[topic].append(score, record["date"])
             
             # Update mastery level based on recent scores
-            recent_scores = self.progress["quiz_scores"][topic][-3:]  # Last 3 attempts
-            avg_score = sum(s["score"] for s in recent_scores) / len(recent_scores)
+            avg_score = progress.quiz_scores[topic].window_mean(3)  # Last 3 attempts
             
             if avg_score >= 85:
-                self.progress["mastery_levels"][topic] = "advanced"
+                progress.mastery_levels[topic] = "advanced"
             elif avg_score >= 70:
-                self.progress["mastery_levels"][topic] = "intermediate"
+                progress.mastery_levels[topic] = "intermediate"
             elif avg_score >= 50:
-                self.progress["mastery_levels"][topic] = "beginner"
+                progress.mastery_levels[topic] = "beginner"
             else:
-                self.progress["mastery_levels"][topic] = "struggling"
-        
-        self.save_progress()
+                progress.mastery_levels[topic] = "struggling"
     
     def get_learning_insights(self) -> Dict:
         """Get insights about user's learning patterns"""
         insights = {
-            "total_topics": len(self.progress["current_topics"]),
-            "mastered_topics": len([t for t, level in self.progress["mastery_levels"].items() if level == "advanced"]),
-            "struggling_topics": [t for t, level in self.progress["mastery_levels"].items() if level == "struggling"],
-            "study_time_hours": round(self.progress["total_study_time"] / 60, 2),
+            "total_topics": len(self.progress.current_topics),
+            "mastered_topics": len(self.aggregates.level_topics["advanced"]),
+            "struggling_topics": self.aggregates.topics_at_level("struggling"),
+            "study_time_hours": round(self.progress.total_study_time / 60, 2),
             "learning_consistency": self.calculate_consistency()
         }
         return insights
     
+    def check_aggregates(self) -> List[str]:
+        """Rebuild the running aggregates from raw history, returning any fields that had drifted"""
+        rebuilt = LearningAggregates.rebuild(self.progress)
+        current = self.aggregates.snapshot()
+        expected = rebuilt.snapshot()
+        mismatches = [field for field in expected if current[field] != expected[field]]
+        self._aggregates = rebuilt
+        return mismatches
+    
+    def has_unsaved_changes(self) -> bool:
+        return self.profile_dirty or bool(self.pending_activities)
+    
+    def memory_estimate(self) -> int:
+        """Approximate bytes held by this profile's loaded data"""
+        size = 1024  # profile document and bookkeeping
+        if self._progress is not None:
+            for scores in self._progress.quiz_scores.values():
+                size += (len(scores.scores) * scores.scores.itemsize
+                         + len(scores.timestamps) * scores.timestamps.itemsize + 200)
+            size += 200 * (len(self._progress.current_topics) + len(self._progress.mastery_levels))
+        return size
+    
     def calculate_consistency(self) -> str:
         """Calculate learning consistency based on activity"""
-        if not self.progress["last_activity"]:
+        if not self.progress.last_activity:
             return "No activity"
         
-        last_activity = datetime.fromisoformat(self.progress["last_activity"])
+        last_activity = datetime.fromisoformat(self.progress.last_activity)
         days_since = (datetime.now() - last_activity).days
         
         if days_since == 0:
@@ -126,3 +431,104 @@ class UserProfile:
             return "Moderate"
         else:
             return "Inactive"
+
+
+class UserProfileRegistry:
+    """Process-wide cache of shared UserProfile instances with LRU eviction
+    
+    Evicted profiles that sessions or buddies still hold stay reachable through a
+    weak map, so a later get() returns that same instance instead of a second one
+    appending to the same activity log with its own sequence numbers.
+    """
+    
+    def __init__(self, max_profiles: int = None, max_bytes: int = None, storage=None):
+        if max_profiles is None:
+            max_profiles = get_setting("system_config", "profile_cache_size", 1000)
+        if max_bytes is None:
+            max_bytes = get_setting("system_config", "profile_cache_max_mb", 256) * 1024 * 1024
+        self.max_profiles = max_profiles
+        self.max_bytes = max_bytes
+        self.storage = storage
+        self.profiles = OrderedDict()
+        self.evicted = weakref.WeakValueDictionary()  # user_id -> evicted profile still referenced elsewhere
+        self.sizes = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+    
+    def get(self, user_id: str) -> UserProfile:
+        """Return the shared profile for a user, loading it on a miss"""
+        with self.lock:
+            user_profile = self.profiles.get(user_id)
+            if user_profile is not None:
+                self.hits += 1
+                self.profiles.move_to_end(user_id)
+            else:
+                self.misses += 1
+                user_profile = self.evicted.pop(user_id, None)
+                if user_profile is None:
+                    user_profile = UserProfile(user_id, storage=self.storage)
+                self.profiles[user_id] = user_profile
+            
+            # Profiles load lazily and grow, so re-measure on every access
+            size = user_profile.memory_estimate()
+            self.total_bytes += size - self.sizes.get(user_id, 0)
+            self.sizes[user_id] = size
+            self._evict()
+            return user_profile
+    
+    def _evict(self):
+        """Drop least recently used profiles until within both limits"""
+        while len(self.profiles) > 1 and (len(self.profiles) > self.max_profiles
+                                          or self.total_bytes > self.max_bytes):
+            user_id, user_profile = self.profiles.popitem(last=False)
+            self.total_bytes -= self.sizes.pop(user_id)
+            self.evictions += 1
+            self.evicted[user_id] = user_profile
+            if user_profile.has_unsaved_changes():
+                user_profile.flush()
+    
+    def flush_all(self):
+        """Flush every cached profile with unsaved changes"""
+        with self.lock:
+            profiles = list(self.profiles.values())
+        for user_profile in profiles:
+            if user_profile.has_unsaved_changes():
+                user_profile.flush()
+    
+    def clear(self):
+        self.flush_all()
+        with self.lock:
+            for user_id, user_profile in self.profiles.items():
+                self.evicted[user_id] = user_profile
+            self.profiles.clear()
+            self.sizes.clear()
+            self.total_bytes = 0
+    
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "cached_profiles": len(self.profiles),
+                "estimated_bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0
+            }
+
+
+_default_registry = None
+
+def get_profile_registry() -> UserProfileRegistry:
+    """Return the process-wide profile registry sized from config.json"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = UserProfileRegistry()
+    return _default_registry
+
+def get_user_profile(user_id: str = "default_user") -> UserProfile:
+    """Get the shared UserProfile for a user from the process-wide registry"""
+    return get_profile_registry().get(user_id)